@@ -1,20 +1,38 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
 from flask_cors import CORS
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+import atexit
+import bisect
+import functools
+import heapq
 import json
 import os
-import statistics
+import queue
+import random
 import logging
 import re
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+import sys
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Tuple, Optional
 import math
+import operator
+from array import array
+from itertools import compress, repeat
 import hashlib
 import sqlite3
 from dataclasses import dataclass
+from collections import OrderedDict
+from types import MappingProxyType
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import threading
 import time
+import weakref
+import click
 
 app = Flask(__name__)
 CORS(app)
@@ -22,7 +40,90 @@ CORS(app)
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-@dataclass
+# SQLite database shared by all workers
+DB_PATH = os.environ.get('VINTED_DB_PATH', 'vinted_analyzer.db')
+DB_BUSY_TIMEOUT = float(os.environ.get('VINTED_DB_BUSY_TIMEOUT', 10.0))  # seconds
+
+# Write-behind batching for /api/learn
+WRITE_BEHIND_BATCH_SIZE = int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 100))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.environ.get('WRITE_BEHIND_FLUSH_INTERVAL', 1.0))  # seconds
+WRITE_BEHIND_MAX_DEPTH = 10000
+
+# How often a worker picks up success rates recorded by other workers
+STRATEGY_RATES_TTL = 60  # seconds
+
+# Sold listings are shared between market position and trend analysis
+SOLD_LISTINGS_TTL = 900  # seconds before a scrape is considered stale
+SOLD_LISTINGS_STALE_TTL = 6 * 3600  # seconds stale data may be served while refreshing
+MARKET_DATA_PURGE_INTERVAL = 3600  # seconds between sweeps of stored data too old to serve
+SOLD_LISTINGS_STALE_RECHECK = 60  # seconds stale data is held in memory before the store is read again
+REFRESH_FAILURE_BACKOFF = 30  # seconds before retrying a failed background refresh, doubling per failure
+REFRESH_FAILURE_MAX_BACKOFF = 900
+SOLD_LISTINGS_LIMIT = 50
+
+# In-memory caches are keyed on user-supplied queries, so keep them bounded
+SOLD_LISTINGS_CACHE_SIZE = int(os.environ.get('SOLD_LISTINGS_CACHE_SIZE', 512))
+MARKET_TRENDS_TTL = 3600
+MARKET_TRENDS_CACHE_SIZE = int(os.environ.get('MARKET_TRENDS_CACHE_SIZE', 1024))
+
+# Outbound HTTP for scrapers
+EBAY_BASE_URL = os.environ.get('EBAY_BASE_URL', 'https://www.ebay.co.uk')
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 10))
+HTTP_PER_HOST_LIMIT = int(os.environ.get('HTTP_PER_HOST_LIMIT', 4))
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 3))
+
+# Independent analysis stages run concurrently, each with its own deadline
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', 8))
+STAGE_TIMEOUTS = {
+    'market_analysis': 20.0,
+    'market_trends': 20.0,
+    'seller_profile': 2.0
+}
+
+# Background refresh of watched market queries
+MARKET_REFRESHER_ENABLED = os.environ.get('MARKET_REFRESHER', '1') == '1'
+REFRESH_TICK_SECONDS = 60
+REFRESH_AHEAD_SECONDS = 180  # refresh this long before SOLD_LISTINGS_TTL runs out
+REFRESH_MAX_PENDING_HITS = 10000  # distinct queries counted between ticks at most
+WATCHLIST_MAX_QUERIES = int(os.environ.get('WATCHLIST_MAX_QUERIES', 500))
+WATCH_IDLE_SECONDS = 7 * 86400  # unpopular watches nobody has looked up for this long are dropped
+WATCH_MIN_POPULARITY = 0.01
+REFRESH_BATCH_SIZE = 10  # queries refreshed per tick at most
+REFRESH_MIN_INTERVAL = 2.0  # seconds between scrapes, to stay under eBay rate limits
+
+# Upper bound on listings accepted by /api/analyze-batch
+BATCH_MAX_LISTINGS = int(os.environ.get('BATCH_MAX_LISTINGS', 100))
+# Batches run on their own pool so they cannot starve single analyses of stage workers
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', 4))
+BATCH_TIMEOUT = float(os.environ.get('BATCH_TIMEOUT', 120.0))  # seconds for a whole batch
+
+# Memoized strategies for repeated /analyze payloads
+STRATEGY_CACHE_SIZE = int(os.environ.get('STRATEGY_CACHE_SIZE', 2048))
+STRATEGY_CACHE_TTL = 600
+
+# Seller profiles cached in front of the seller_profiles table
+SELLER_PROFILE_CACHE_SIZE = int(os.environ.get('SELLER_PROFILE_CACHE_SIZE', 4096))
+SELLER_PROFILE_TTL = 60  # learned from outcomes, so other workers' updates are picked up this often
+SELLER_PROFILE_NEGATIVE_TTL = 300  # how long "no stored profile" is remembered
+SELLER_EWMA_ALPHA = 0.2  # weight of each new outcome once a seller has a few
+
+# Brand and category catalog, polled for changes and reloaded in place
+CATALOG_PATH = os.environ.get('VINTED_CATALOG_PATH',
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'catalog.json'))
+CATALOG_RELOAD_ENABLED = os.environ.get('CATALOG_RELOAD', '1') == '1'
+CATALOG_POLL_SECONDS = 30
+
+# Brand autocomplete
+BRAND_SUGGESTION_LIMIT = 8
+BRAND_SUGGESTION_CACHE_SIZE = int(os.environ.get('BRAND_SUGGESTION_CACHE_SIZE', 4096))
+
+# Browser and service worker caching of GET API responses, in seconds
+BRANDS_MAX_AGE = 300
+BRANDS_STALE_WHILE_REVALIDATE = 86400
+MARKET_TRENDS_MAX_AGE = 300
+MARKET_TRENDS_STALE_WHILE_REVALIDATE = MARKET_TRENDS_TTL
+
+@dataclass(slots=True)
 class MarketDataPoint:
     price: float
     platform: str
@@ -39,156 +140,1883 @@ class SellerProfile:
     account_age_days: int
     feedback_score: float
 
-class EnhancedVintedAnalyzer:
+# Cached in place of a SellerProfile for sellers without a stored row
+NO_SELLER_PROFILE = object()
+
+
+def ewma_update(mean: float, variance: float, count: int, sample: float,
+                alpha: float = SELLER_EWMA_ALPHA) -> Tuple[float, float, int]:
+    """Fold one sample into an exponentially weighted mean and variance.
+
+    The weight starts at 1/n, which makes the first samples an exact running
+    mean and variance (Welford's update), and settles at alpha so that old
+    behaviour fades out.
+    """
+    count += 1
+    weight = max(alpha, 1.0 / count)
+    delta = sample - mean
+    mean += weight * delta
+    variance = (1 - weight) * (variance + weight * delta * delta)
+    return mean, variance, count
+
+class Counter:
+    """Monotonic counter, optionally split by label values"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.type = 'counter'
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition model"""
+
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    class _Child:
+        __slots__ = ('histogram', 'key', 'counts', 'sum', 'count')
+
+        def __init__(self, histogram: 'Histogram', key: Tuple):
+            self.histogram = histogram
+            self.key = key
+            self.counts = [0] * (len(histogram.buckets) + 1)
+            self.sum = 0.0
+            self.count = 0
+
+        def observe(self, value: float):
+            index = bisect.bisect_left(self.histogram.buckets, value)
+            with self.histogram._lock:
+                self.counts[index] += 1
+                self.sum += value
+                self.count += 1
+
+        def time(self) -> '_Timer':
+            return _Timer(self)
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.type = 'histogram'
+        self.buckets = tuple(buckets)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels) -> '_Child':
+        """Return the series for a label set; hot paths should hold on to it"""
+        key = tuple(sorted(labels.items()))
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._Child(self, key))
+        return child
+
+    def observe(self, value: float, **labels):
+        self.labels(**labels).observe(value)
+
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        samples = []
+        with self._lock:
+            for key, child in self._children.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    samples.append((f'{self.name}_bucket', key + (('le', le),), cumulative))
+                samples.append((f'{self.name}_sum', key, child.sum))
+                samples.append((f'{self.name}_count', key, child.count))
+        return samples
+
+
+class _Timer:
+    """Context manager and decorator that records elapsed seconds in a histogram series"""
+
+    __slots__ = ('child', 'start')
+
+    def __init__(self, child: Histogram._Child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.child.observe(time.perf_counter() - self.start)
+
+    def __call__(self, fn: Callable) -> Callable:
+        child = self.child
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+
+        return wrapper
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text format"""
+
     def __init__(self):
-        self.brands_data = {
-            # Luxury brands - higher base prices, slower depreciation
-            "balenciaga": {"base": 200, "depreciation": 0.05, "demand": "luxury", "seasonal_factor": 1.0},
-            "gucci": {"base": 250, "depreciation": 0.04, "demand": "luxury", "seasonal_factor": 1.0},
-            "louis vuitton": {"base": 300, "depreciation": 0.03, "demand": "luxury", "seasonal_factor": 1.0},
-            "prada": {"base": 280, "depreciation": 0.04, "demand": "luxury", "seasonal_factor": 1.0},
-            "versace": {"base": 220, "depreciation": 0.05, "demand": "luxury", "seasonal_factor": 1.0},
-            
-            # Premium brands - moderate prices, steady demand
-            "north face": {"base": 85, "depreciation": 0.08, "demand": "high", "seasonal_factor": 1.3},
-            "patagonia": {"base": 90, "depreciation": 0.07, "demand": "high", "seasonal_factor": 1.25},
-            "ralph lauren": {"base": 80, "depreciation": 0.10, "demand": "high", "seasonal_factor": 1.0},
-            "tommy hilfiger": {"base": 70, "depreciation": 0.12, "demand": "medium", "seasonal_factor": 1.0},
-            "calvin klein": {"base": 65, "depreciation": 0.12, "demand": "medium", "seasonal_factor": 1.0},
-            "lacoste": {"base": 75, "depreciation": 0.10, "demand": "medium", "seasonal_factor": 1.0},
-            
-            # Streetwear - trend-dependent
-            "supreme": {"base": 120, "depreciation": 0.15, "demand": "trend", "seasonal_factor": 1.1},
-            "jordan": {"base": 90, "depreciation": 0.12, "demand": "trend", "seasonal_factor": 1.05},
-            "nike": {"base": 60, "depreciation": 0.15, "demand": "high", "seasonal_factor": 1.0},
-            "adidas": {"base": 55, "depreciation": 0.15, "demand": "high", "seasonal_factor": 1.0},
-            "off-white": {"base": 150, "depreciation": 0.20, "demand": "trend", "seasonal_factor": 1.0},
-            
-            # Mid-range brands
-            "new balance": {"base": 65, "depreciation": 0.18, "demand": "medium", "seasonal_factor": 1.0},
-            "converse": {"base": 50, "depreciation": 0.20, "demand": "medium", "seasonal_factor": 1.0},
-            "vans": {"base": 45, "depreciation": 0.20, "demand": "medium", "seasonal_factor": 1.0},
-            "reebok": {"base": 50, "depreciation": 0.22, "demand": "medium", "seasonal_factor": 1.0},
-            "puma": {"base": 45, "depreciation": 0.18, "demand": "medium", "seasonal_factor": 1.0},
-            
-            # Budget brands
-            "champion": {"base": 40, "depreciation": 0.25, "demand": "low", "seasonal_factor": 1.0},
-            "fila": {"base": 45, "depreciation": 0.25, "demand": "low", "seasonal_factor": 1.0},
-            "carhartt": {"base": 55, "depreciation": 0.20, "demand": "medium", "seasonal_factor": 1.15},
-            "river island": {"base": 35, "depreciation": 0.25, "demand": "medium", "seasonal_factor": 1.0}
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        metric = Counter(name, help_text)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = Histogram.DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[Tuple[str, str, str, List[Tuple[Dict, float]]]]]):
+        """Add a callback returning (name, type, help, [(labels, value)]) read at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, key, value in metric.samples():
+                lines.append(f'{name}{self._format_labels(key)} {value}')
+
+        for collector in self._collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                logging.error(f"Metrics collector error: {e}")
+                continue
+            for name, metric_type, help_text, samples in families:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in samples:
+                    lines.append(f'{name}{self._format_labels(tuple(sorted(labels.items())))} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+    def _format_labels(self, key: Tuple) -> str:
+        if not key:
+            return ''
+        pairs = ','.join(
+            f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+            for name, value in key
+        )
+        return '{' + pairs + '}'
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    'vinted_stage_duration_seconds', 'Time spent in each analysis hot-path stage'
+)
+SQLITE_SECONDS = metrics.histogram(
+    'vinted_sqlite_duration_seconds', 'Time spent in SQLite operations'
+)
+REQUEST_SECONDS = metrics.histogram(
+    'vinted_request_duration_seconds', 'Flask request handling time by endpoint'
+)
+UPSTREAM_ERRORS = metrics.counter(
+    'vinted_upstream_errors_total', 'Failed upstream scrapes by error type'
+)
+
+
+def _migrate_baseline(conn: sqlite3.Connection):
+    """Tables from the original schema"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS negotiations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_name TEXT,
+            original_price REAL,
+            offered_price REAL,
+            strategy_used TEXT,
+            outcome TEXT,
+            seller_response_time INTEGER,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS market_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_query TEXT,
+            platform TEXT,
+            price REAL,
+            condition TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS seller_profiles (
+            seller_id TEXT PRIMARY KEY,
+            avg_response_time REAL,
+            negotiation_flexibility REAL,
+            listing_count INTEGER,
+            account_age_days INTEGER,
+            feedback_score REAL,
+            last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _migrate_market_data_store(conn: sqlite3.Connection):
+    """Persistent market data cache"""
+    # Databases created before versioning may already have the column
+    columns = [column[1] for column in conn.execute('PRAGMA table_info(market_data)')]
+    if 'days_ago' not in columns:
+        conn.execute('ALTER TABLE market_data ADD COLUMN days_ago INTEGER DEFAULT 0')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS market_data_fetches (
+            item_query TEXT PRIMARY KEY,
+            fetched_at REAL,
+            point_count INTEGER
+        )
+    ''')
+
+
+def _migrate_watchlist(conn: sqlite3.Connection):
+    """Server-side watchlist and the background refresher lease"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS watched_markets (
+            item_query TEXT PRIMARY KEY,
+            watchers INTEGER DEFAULT 0,
+            hits REAL DEFAULT 0,
+            created_at REAL
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS scheduler_leases (
+            name TEXT PRIMARY KEY,
+            owner TEXT,
+            expires_at REAL
+        )
+    ''')
+
+
+def _migrate_seller_stats(conn: sqlite3.Connection):
+    """Running estimator state for seller response time and flexibility"""
+    columns = [column[1] for column in conn.execute('PRAGMA table_info(seller_profiles)')]
+    for column, definition in (('response_time_var', 'REAL DEFAULT 0'),
+                               ('response_count', 'INTEGER DEFAULT 0'),
+                               ('flexibility_count', 'INTEGER DEFAULT 0')):
+        if column not in columns:
+            conn.execute(f'ALTER TABLE seller_profiles ADD COLUMN {column} {definition}')
+
+
+def _migrate_watchlist_activity(conn: sqlite3.Connection):
+    """When each watched query was last watched or looked up, so idle ones can expire"""
+    columns = [column[1] for column in conn.execute('PRAGMA table_info(watched_markets)')]
+    if 'last_active_at' not in columns:
+        conn.execute('ALTER TABLE watched_markets ADD COLUMN last_active_at REAL')
+    conn.execute('UPDATE watched_markets SET last_active_at = created_at WHERE last_active_at IS NULL')
+
+
+def _migrate_indexes(conn: sqlite3.Connection):
+    """Indexes for the per-query and per-strategy lookups"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_market_data_item_query ON market_data (item_query)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_negotiations_strategy ON negotiations (strategy_used, outcome)')
+
+
+def _migrate_strategy_stats(conn: sqlite3.Connection):
+    """Running per-strategy outcome totals, backfilled from negotiations"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS strategy_stats (
+            strategy_used TEXT PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0,
+            successes INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    conn.execute('''
+        INSERT OR REPLACE INTO strategy_stats (strategy_used, total, successes)
+        SELECT COALESCE(strategy_used, ''),
+               COUNT(*),
+               SUM(CASE WHEN outcome = 'accepted' THEN 1 ELSE 0 END)
+        FROM negotiations
+        GROUP BY COALESCE(strategy_used, '')
+    ''')
+
+
+_SQLITE_TRANSACTION = SQLITE_SECONDS.labels(operation='transaction')
+_SQLITE_FETCHONE = SQLITE_SECONDS.labels(operation='fetchone')
+_SQLITE_FETCHALL = SQLITE_SECONDS.labels(operation='fetchall')
+
+
+class Database:
+    """Per-thread SQLite connections in WAL mode, with versioned schema migrations"""
+
+    # Applied in order; PRAGMA user_version records how many have run
+    MIGRATIONS = [
+        _migrate_baseline,
+        _migrate_market_data_store,
+        _migrate_watchlist,
+        _migrate_indexes,
+        _migrate_strategy_stats,
+        _migrate_seller_stats,
+        _migrate_watchlist_activity
+    ]
+
+    # Open databases, so connections inherited across fork() can be dropped
+    _instances = weakref.WeakSet()
+
+    def __init__(self, path: str = DB_PATH, busy_timeout: float = DB_BUSY_TIMEOUT):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+        Database._instances.add(self)
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.ensure_schema()
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def ensure_schema(self):
+        """Migrate on first use in this process; a read-only version check once the schema is current"""
+        if self._schema_ready:
+            return
+
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout)
+            try:
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+            finally:
+                conn.close()
+
+            if version < len(self.MIGRATIONS):
+                self.migrate()
+            self._schema_ready = True
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in one transaction, committing on success"""
+        conn = self.connection()
+        with _SQLITE_TRANSACTION.time(), conn:
+            yield conn
+
+    def fetchone(self, sql: str, params: Tuple = ()) -> Optional[Tuple]:
+        with _SQLITE_FETCHONE.time():
+            return self.connection().execute(sql, params).fetchone()
+
+    def fetchall(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        with _SQLITE_FETCHALL.time():
+            return self.connection().execute(sql, params).fetchall()
+
+    @SQLITE_SECONDS.labels(operation='migrate').time()
+    def migrate(self) -> int:
+        """Apply pending migrations, returning the resulting schema version"""
+        conn = self._connect(isolation_level=None)
+        try:
+            # BEGIN IMMEDIATE serializes workers starting at the same time
+            conn.execute('BEGIN IMMEDIATE')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+
+            for number, migration in enumerate(self.MIGRATIONS[version:], start=version + 1):
+                migration(conn)
+                logging.info(f"Applied database migration {number}: {migration.__doc__}")
+
+            conn.execute(f'PRAGMA user_version = {len(self.MIGRATIONS)}')
+            conn.execute('COMMIT')
+            return len(self.MIGRATIONS)
+
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+
+        finally:
+            conn.close()
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @classmethod
+    def _after_fork(cls):
+        # SQLite connections must not be shared with the parent; the schema
+        # check already done there still holds
+        for db in list(cls._instances):
+            db._local = threading.local()
+            db._schema_lock = threading.Lock()
+
+    def _connect(self, **kwargs) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, cached_statements=256, **kwargs)
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}')
+        # WAL lets readers carry on while another worker writes
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        return conn
+
+
+os.register_at_fork(after_in_child=Database._after_fork)
+
+
+class WriteBehindQueue:
+    """Applies queued database writes in batched transactions on a background thread"""
+
+    def __init__(self, db: Database, batch_size: int = 100, flush_interval: float = 1.0,
+                 max_depth: int = 10000):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_depth)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        atexit.register(self.close)
+
+    def submit(self, write: Callable[[sqlite3.Connection], Any],
+               on_commit: Optional[Callable[[Any], None]] = None):
+        """Queue a write; on_commit receives its return value once it is committed"""
+        self._ensure_started()
+        with self._lock:
+            self.enqueued += 1
+        if self._closed:
+            # Nothing consumes the queue after close(), so write in place
+            self._write_batch([(write, on_commit)])
+            return
+        try:
+            self._queue.put_nowait((write, on_commit))
+        except queue.Full:
+            # Shed load onto the caller rather than drop the write
+            self._write_batch([(write, on_commit)])
+
+    def depth(self) -> int:
+        """Number of writes waiting to be flushed"""
+        return self._queue.qsize()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far has been written"""
+        # close() already wrote everything out and nothing would answer the marker
+        if self._thread is None or self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put((None, done.set))
+        return done.wait(timeout)
+
+    def close(self):
+        """Flush outstanding writes and stop the background thread"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put((None, None))
+            self._thread.join()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'depth': self.depth(),
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'batches': self.batches,
+                'failures': self.failures
+            }
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None and not self._closed:
+                    self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = []
+            markers = []
+            stop = False
+            deadline = None
+
+            # Collect until the batch is full or the oldest write has waited flush_interval
+            while len(batch) < self.batch_size:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    write, callback = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+
+                if write is None:
+                    if callback is None:
+                        stop = True
+                    else:
+                        markers.append(callback)
+                    break
+
+                batch.append((write, callback))
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch:
+                self._write_batch(batch)
+            for marker in markers:
+                marker()
+            if stop:
+                # Drain anything queued before close() was called, then
+                # release flushes that raced it
+                remaining = []
+                markers = []
+                while True:
+                    try:
+                        write, callback = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if write is not None:
+                        remaining.append((write, callback))
+                    elif callback is not None:
+                        markers.append(callback)
+                if remaining:
+                    self._write_batch(remaining)
+                for marker in markers:
+                    marker()
+                return
+
+    def _write_batch(self, batch: List[Tuple[Callable, Optional[Callable]]]):
+        try:
+            with self.db.transaction() as conn:
+                results = [write(conn) for write, _ in batch]
+        except Exception as e:
+            # Retry one by one so a single bad write cannot sink the whole batch
+            logging.error(f"Write-behind batch failed, retrying individually: {e}")
+            for item in batch:
+                if len(batch) > 1:
+                    self._write_batch([item])
+                else:
+                    with self._lock:
+                        self.failures += 1
+            return
+
+        with self._lock:
+            self.written += len(batch)
+            self.batches += 1
+
+        for (_, on_commit), result in zip(batch, results):
+            if on_commit is not None:
+                try:
+                    on_commit(result)
+                except Exception as e:
+                    logging.error(f"Write-behind callback error: {e}")
+
+
+class LRUCache:
+    """Thread-safe LRU cache with per-entry TTL and hit/miss/eviction counters"""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._key_locks = {}  # key -> [lock, waiters]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry, marking it as recently used"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if time.time() >= expires_at:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry without counting a lookup or marking it as used"""
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None or time.time() >= entry[1]:
+            return default
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store an entry, evicting expired and then least recently used entries"""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+
+            if len(self._data) > self.max_size:
+                self._purge_expired()
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Return a cached entry or compute it, with one computation per key at a time"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            key_lock[1] += 1
+
+        try:
+            with key_lock[0]:
+                # Another thread may have filled the entry while we waited
+                with self._lock:
+                    entry = self._data.get(key)
+                    if entry is not None and time.time() < entry[1]:
+                        self._data.move_to_end(key)
+                        return entry[0]
+
+                value = compute()
+                self.set(key, value, ttl)
+                return value
+        finally:
+            with self._lock:
+                key_lock[1] -= 1
+                if key_lock[1] == 0:
+                    del self._key_locks[key]
+
+    def invalidate(self, key: Hashable = None):
+        """Drop one entry, or every entry if no key is given"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self) -> Dict:
+        """Return cache size and counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
+
+    def _purge_expired(self):
+        """Remove expired entries; caller must hold the lock"""
+        now = time.time()
+        expired = [key for key, (_, expires_at) in self._data.items() if now >= expires_at]
+        for key in expired:
+            del self._data[key]
+        self.expirations += len(expired)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single execution"""
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn for key, or wait for and share the result of a call already in flight"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Whether a call for key is currently running"""
+        with self._lock:
+            return key in self._calls
+
+
+class lazy_attribute:
+    """Like functools.cached_property, but builds the value exactly once under concurrent first access"""
+
+    def __init__(self, factory: Callable[[Any], Any]):
+        self.factory = factory
+        self.name = factory.__name__
+        self._lock = threading.RLock()
+        functools.update_wrapper(self, factory)
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        with self._lock:
+            # Once stored, the instance attribute shadows this descriptor
+            if self.name not in instance.__dict__:
+                instance.__dict__[self.name] = self.factory(instance)
+            return instance.__dict__[self.name]
+
+
+class HTTPClient:
+    """Connection-pooled HTTP client with per-host limits and retry/backoff"""
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, pool_size: int = 10, per_host_limit: int = 4, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0, max_retry_after: float = 30.0):
+        self.per_host_limit = per_host_limit
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+
+        # One adapter (and so one connection pool) shared by every thread's session
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+        self._local = threading.local()
+
+        self._lock = threading.Lock()
+        self._host_slots = {}
+        self.requests_sent = 0
+        self.retries = 0
+        self.failures = 0
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET a URL, retrying connection errors, 429s and 5xxs with jittered backoff"""
+        host = urlparse(url).netloc
+        session = self._session()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self._host_slot(host):
+                    with self._lock:
+                        self.requests_sent += 1
+                    response = session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code not in self.RETRY_STATUSES or attempt == self.max_retries:
+                    if response.status_code >= 400:
+                        with self._lock:
+                            self.failures += 1
+                    return response
+                delay = self._retry_after(response)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                response.close()
+
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    def stats(self) -> Dict:
+        """Return request counters and connection reuse across the pool"""
+        opened = 0
+        pool_requests = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                pool_requests += pool.num_requests
+
+        with self._lock:
+            return {
+                'requests': self.requests_sent,
+                'retries': self.retries,
+                'failures': self.failures,
+                'connections_opened': opened,
+                'connections_reused': max(0, pool_requests - opened)
+            }
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', self.adapter)
+            session.mount('http://', self.adapter)
+            self._local.session = session
+        return session
+
+    def _host_slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return slot
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        """Parse a Retry-After header given in seconds or as an HTTP date"""
+        header = response.headers.get('Retry-After')
+        if not header:
+            return None
+
+        try:
+            delay = float(header)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(header)
+            except (TypeError, ValueError):
+                return None
+            if retry_at.tzinfo is None:
+                retry_at = retry_at.replace(tzinfo=timezone.utc)
+            delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+
+        return max(0.0, min(delay, self.max_retry_after))
+
+
+class PriceSeries:
+    """Compact float64 price array with C-speed summary statistics.
+
+    Prices are kept in an ``array('d')`` (optionally alongside sale ages in
+    days) so reductions run through ``sum``/``map`` over C buffers instead of
+    per-object Python loops, and the sorted copy is built at most once.
+    """
+
+    __slots__ = ('prices', 'days_ago', '_sorted', '_sum')
+
+    def __init__(self, prices: Iterable[float] = (), days_ago: Optional[Iterable[int]] = None):
+        self.prices = prices if isinstance(prices, array) else array('d', prices)
+        if days_ago is None:
+            self.days_ago = None
+        else:
+            self.days_ago = days_ago if isinstance(days_ago, array) else array('l', days_ago)
+        self._sorted = None
+        self._sum = None
+
+    @classmethod
+    def from_points(cls, points: Iterable['MarketDataPoint']) -> 'PriceSeries':
+        points = list(points)
+        return cls((p.price for p in points), (p.days_ago for p in points))
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def head(self, n: int) -> 'PriceSeries':
+        return PriceSeries(self.prices[:n], self.days_ago[:n] if self.days_ago is not None else None)
+
+    def tail(self, n: int) -> 'PriceSeries':
+        return PriceSeries(self.prices[-n:], self.days_ago[-n:] if self.days_ago is not None else None)
+
+    def sum(self) -> float:
+        if self._sum is None:
+            self._sum = math.fsum(self.prices)
+        return self._sum
+
+    def mean(self) -> float:
+        return self.sum() / len(self.prices)
+
+    def sorted(self) -> List[float]:
+        if self._sorted is None:
+            self._sorted = sorted(self.prices)
+        return self._sorted
+
+    def median(self) -> float:
+        return self.percentile(50)
+
+    def percentile(self, pct: float) -> float:
+        """Linearly interpolated percentile (50 gives the usual median)"""
+        ordered = self.sorted()
+        position = (len(ordered) - 1) * pct / 100
+        lower = math.floor(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+    def stdev(self) -> float:
+        """Sample standard deviation, 0 for fewer than two prices"""
+        n = len(self.prices)
+        if n < 2:
+            return 0.0
+        # Shift by the mean before squaring to avoid cancellation
+        deviations = array('d', map(operator.sub, self.prices, repeat(self.mean(), n)))
+        return math.sqrt(math.fsum(map(operator.mul, deviations, deviations)) / (n - 1))
+
+    def trimmed_mean(self, proportion: float = 0.1) -> float:
+        """Mean after dropping the given share of prices from each end"""
+        ordered = self.sorted()
+        cut = int(len(ordered) * proportion)
+        kept = ordered[cut:len(ordered) - cut] or ordered
+        return math.fsum(kept) / len(kept)
+
+    def count_within(self, days: int) -> int:
+        """Number of sales at most this many days old"""
+        return sum(map(days.__ge__, self.days_ago))
+
+    def recency_weighted_mean(self, half_life_days: float = 14.0) -> float:
+        """Mean with each sale's weight halving every half_life_days"""
+        decay = math.log(2) / half_life_days
+        weights = array('d', map(math.exp, map(operator.mul, self.days_ago, repeat(-decay, len(self.days_ago)))))
+        return math.fsum(map(operator.mul, self.prices, weights)) / math.fsum(weights)
+
+    def trend_slope(self) -> float:
+        """Least-squares price change per day, positive when prices are rising"""
+        n = len(self.prices)
+        if n < 2:
+            return 0.0
+        # Older sales sit further left on the time axis
+        times = array('d', map(operator.neg, self.days_ago))
+        mean_time = math.fsum(times) / n
+        centred = array('d', map(operator.sub, times, repeat(mean_time, n)))
+        spread = math.fsum(map(operator.mul, centred, centred))
+        if spread == 0:
+            return 0.0
+        return math.fsum(map(operator.mul, centred, self.prices)) / spread
+
+    def summary(self) -> Dict[str, float]:
+        """All distribution statistics, sharing one sum and one sort"""
+        summary = {
+            'count': len(self.prices),
+            'mean': self.mean(),
+            'median': self.median(),
+            'stdev': self.stdev(),
+            'p25': self.percentile(25),
+            'p75': self.percentile(75),
+            'trimmed_mean': self.trimmed_mean()
         }
-        
-        self.item_categories = {
-            # Outerwear - holds value well
-            "jacket": {"base": 60, "seasonality": 0.3, "durability": "high", "size_variance": 0.1},
-            "coat": {"base": 70, "seasonality": 0.4, "durability": "high", "size_variance": 0.15},
-            "hoodie": {"base": 40, "seasonality": 0.1, "durability": "medium", "size_variance": 0.05},
-            "parka": {"base": 80, "seasonality": 0.5, "durability": "high", "size_variance": 0.1},
-            "blazer": {"base": 65, "seasonality": 0.1, "durability": "high", "size_variance": 0.1},
-            
-            # Footwear - brand dependent
-            "trainers": {"base": 50, "seasonality": 0.1, "durability": "medium", "size_variance": 0.25},
-            "sneakers": {"base": 55, "seasonality": 0.1, "durability": "medium", "size_variance": 0.25},
-            "boots": {"base": 60, "seasonality": 0.3, "durability": "high", "size_variance": 0.2},
-            "shoes": {"base": 45, "seasonality": 0.1, "durability": "medium", "size_variance": 0.2},
-            
-            # Basics - depreciate quickly
-            "jeans": {"base": 35, "seasonality": 0.0, "durability": "high", "size_variance": 0.15},
-            "trousers": {"base": 30, "seasonality": 0.0, "durability": "high", "size_variance": 0.15},
-            "t-shirt": {"base": 20, "seasonality": 0.0, "durability": "low", "size_variance": 0.1},
-            "shirt": {"base": 25, "seasonality": 0.0, "durability": "medium", "size_variance": 0.1},
-            "dress": {"base": 45, "seasonality": 0.2, "durability": "medium", "size_variance": 0.1},
-            
-            # Accessories
-            "bag": {"base": 40, "seasonality": 0.1, "durability": "high", "size_variance": 0.05},
-            "watch": {"base": 70, "seasonality": 0.0, "durability": "high", "size_variance": 0.0}
+        if self.days_ago is not None:
+            summary['recency_weighted_mean'] = self.recency_weighted_mean()
+            summary['trend_slope'] = self.trend_slope()
+        return summary
+
+
+class StringTable:
+    """Interns repeated labels (platforms, conditions) as small integer codes"""
+
+    def __init__(self):
+        self._codes = {}
+        self._values = []
+        self._lock = threading.Lock()
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self._values)
+                    self._values.append(sys.intern(value))
+                    self._codes[value] = code
+        return code
+
+    def value(self, code: int) -> str:
+        return self._values[code]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+PLATFORMS = StringTable()
+CONDITIONS = StringTable()
+
+
+class MarketSeries:
+    """Struct-of-arrays storage for market data points.
+
+    One typed array per field (prices, sale ages, interned platform and
+    condition codes) costs about 20 bytes per sale, against several hundred
+    for a list of ``MarketDataPoint`` objects. Series held in the caches are
+    shared between requests and must not be mutated; ``weighted`` returns a
+    view over the same arrays that applies per-platform weights on read.
+    """
+
+    __slots__ = ('prices', 'days_ago', 'platforms', 'conditions', 'weights')
+
+    def __init__(self, prices: Optional[array] = None, days_ago: Optional[array] = None,
+                 platforms: Optional[array] = None, conditions: Optional[array] = None,
+                 weights: Optional[List[float]] = None):
+        self.prices = prices if prices is not None else array('d')
+        self.days_ago = days_ago if days_ago is not None else array('l')
+        self.platforms = platforms if platforms is not None else array('H')
+        self.conditions = conditions if conditions is not None else array('H')
+        # Per platform code price multipliers, or None for raw prices
+        self.weights = weights
+
+    @classmethod
+    def from_points(cls, points: Iterable[MarketDataPoint]) -> 'MarketSeries':
+        series = cls()
+        for p in points:
+            series.append(p.price, p.platform, p.condition, p.days_ago)
+        return series
+
+    def append(self, price: float, platform: str, condition: str, days_ago: int):
+        self.prices.append(price)
+        self.days_ago.append(days_ago)
+        self.platforms.append(PLATFORMS.code(platform))
+        self.conditions.append(CONDITIONS.code(condition))
+
+    def extend(self, other: 'MarketSeries'):
+        """Append another series, baking in its weights if it is a weighted view"""
+        self.prices.extend(other.effective_prices())
+        self.days_ago.extend(other.days_ago)
+        self.platforms.extend(other.platforms)
+        self.conditions.extend(other.conditions)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def __getitem__(self, index: slice) -> 'MarketSeries':
+        return MarketSeries(self.prices[index], self.days_ago[index],
+                            self.platforms[index], self.conditions[index], self.weights)
+
+    def __iter__(self) -> Iterator[MarketDataPoint]:
+        for price, platform, condition, days_ago in self.rows():
+            yield MarketDataPoint(price=price, platform=platform, condition=condition, days_ago=days_ago)
+
+    def rows(self) -> Iterator[Tuple[float, str, str, int]]:
+        """(price, platform, condition, days_ago) tuples, weights applied"""
+        return zip(self.effective_prices(),
+                   map(PLATFORMS.value, self.platforms),
+                   map(CONDITIONS.value, self.conditions),
+                   self.days_ago)
+
+    def within_days(self, days: int) -> 'MarketSeries':
+        if all(map(days.__ge__, self.days_ago)):
+            return self
+        keep = list(map(days.__ge__, self.days_ago))
+        return MarketSeries(array('d', compress(self.prices, keep)), array('l', compress(self.days_ago, keep)),
+                            array('H', compress(self.platforms, keep)), array('H', compress(self.conditions, keep)),
+                            self.weights)
+
+    def weighted(self, platform_weights: Dict[str, float], default: float = 1.0) -> 'MarketSeries':
+        """View of this series with prices scaled per platform, sharing its arrays"""
+        weights = [default] * len(PLATFORMS)
+        for platform, weight in platform_weights.items():
+            code = PLATFORMS.code(platform)
+            if code >= len(weights):
+                weights.extend(repeat(default, code + 1 - len(weights)))
+            weights[code] = weight
+        return MarketSeries(self.prices, self.days_ago, self.platforms, self.conditions, weights)
+
+    def effective_prices(self) -> array:
+        if self.weights is None:
+            return self.prices
+        return array('d', map(operator.mul, self.prices, map(self.weights.__getitem__, self.platforms)))
+
+    def price_series(self) -> PriceSeries:
+        return PriceSeries(self.effective_prices(), self.days_ago)
+
+    def platform_count(self) -> int:
+        return len(set(self.platforms))
+
+
+class SoldListingsParser(HTMLParser):
+    """Streaming extractor for eBay sold listing cards.
+
+    Only the price, end date and "Shop on eBay" marker of each ``.s-item``
+    card are collected; no document tree is built and parsing stops once
+    ``limit`` cards have been seen.
+    """
+
+    VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                 'link', 'meta', 'source', 'track', 'wbr'}
+    FIELDS = {'s-item__price': 'price', 's-item__endedDate': 'ended'}
+    CHUNK_SIZE = 32 * 1024
+
+    def __init__(self, limit: int):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.cards = []  # (card text, price text, ended text)
+        self._stack = []  # open tags inside the current card
+        self._text = []
+        self._fields = {}
+        self._field = None
+        self._field_depth = 0
+
+    @classmethod
+    def extract(cls, html: str, limit: int) -> List[Tuple[str, Optional[str], Optional[str]]]:
+        """Return (card text, price text, ended text) for the first limit cards"""
+        parser = cls(limit)
+        for start in range(0, len(html), cls.CHUNK_SIZE):
+            parser.feed(html[start:start + cls.CHUNK_SIZE])
+            if parser.done:
+                break
+        else:
+            parser.close()
+            if parser._stack:
+                # Keep a card left open by a truncated page
+                parser._finish_card()
+        return parser.cards[:limit]
+
+    @property
+    def done(self) -> bool:
+        return len(self.cards) >= self.limit
+
+    def handle_starttag(self, tag, attrs):
+        if self.done or tag in self.VOID_TAGS:
+            return
+
+        classes = ()
+        for name, value in attrs:
+            if name == 'class' and value:
+                classes = value.split()
+                break
+
+        if 's-item' in classes:
+            # A new card at the same level implicitly closes an unterminated one
+            if self._stack and self._stack[0] == tag:
+                self._finish_card()
+            if not self._stack:
+                self._stack.append(tag)
+                return
+
+        if not self._stack:
+            return
+
+        self._stack.append(tag)
+        if self._field is None:
+            for css_class, field in self.FIELDS.items():
+                if css_class in classes and field not in self._fields:
+                    self._field = field
+                    self._field_depth = len(self._stack)
+                    self._fields[field] = []
+                    break
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing tags never open a card or field
+        pass
+
+    def handle_endtag(self, tag):
+        if not self._stack or tag not in self._stack:
+            return
+
+        # Pop back to the matching tag, closing any unterminated children
+        while self._stack:
+            if self._field is not None and len(self._stack) == self._field_depth:
+                self._field = None
+            if self._stack.pop() == tag:
+                break
+
+        if not self._stack:
+            self._finish_card()
+
+    def handle_data(self, data):
+        if self._stack:
+            self._text.append(data)
+            if self._field is not None:
+                self._fields[self._field].append(data)
+
+    def _finish_card(self):
+        price = self._fields.get('price')
+        ended = self._fields.get('ended')
+        self.cards.append((
+            ''.join(self._text),
+            ''.join(price) if price is not None else None,
+            ''.join(ended) if ended is not None else None
+        ))
+        self._stack = []
+        self._text = []
+        self._fields = {}
+        self._field = None
+
+
+class MarketDataStore:
+    """SQLite-backed store for scraped market data, shared by all workers"""
+
+    def __init__(self, db: Database):
+        self.db = db
+        self._purged_at = 0.0
+
+    def load(self, query: str) -> Optional[Tuple[MarketSeries, float]]:
+        """Return stored data points and their fetch time, or None if never fetched"""
+        try:
+            row = self.db.fetchone('SELECT fetched_at FROM market_data_fetches WHERE item_query = ?', (query,))
+            if not row:
+                return None
+
+            fetched_at = row[0]
+            rows = self.db.fetchall('''
+                SELECT price, platform, condition, days_ago
+                FROM market_data
+                WHERE item_query = ?
+                ORDER BY id
+            ''', (query,))
+
+            # Sale ages were recorded relative to the fetch, so age them forward
+            elapsed_days = int((time.time() - fetched_at) // 86400)
+            series = MarketSeries()
+            for price, platform, condition, days_ago in rows:
+                series.append(price, platform, condition, (days_ago or 0) + elapsed_days)
+            return series, fetched_at
+
+        except Exception as e:
+            logging.error(f"Market data load error: {e}")
+            return None
+
+    def save(self, query: str, points: MarketSeries, fetched_at: float):
+        """Replace the stored data points for a query"""
+        try:
+            with self.db.transaction() as conn:
+                conn.execute('DELETE FROM market_data WHERE item_query = ?', (query,))
+                conn.executemany('''
+                    INSERT INTO market_data (item_query, platform, price, condition, days_ago)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', [(query, platform, price, condition, days_ago)
+                      for price, platform, condition, days_ago in points.rows()])
+                conn.execute('''
+                    INSERT OR REPLACE INTO market_data_fetches (item_query, fetched_at, point_count)
+                    VALUES (?, ?, ?)
+                ''', (query, fetched_at, len(points)))
+
+        except Exception as e:
+            logging.error(f"Market data save error: {e}")
+
+        # Every distinct query leaves rows behind, so sweep the expired ones now and then
+        if time.time() - self._purged_at >= MARKET_DATA_PURGE_INTERVAL:
+            self.purge(time.time() - SOLD_LISTINGS_TTL - SOLD_LISTINGS_STALE_TTL)
+
+    def purge(self, fetched_before: float) -> int:
+        """Delete queries fetched before a cutoff, and rows no fetch accounts for; returns queries removed"""
+        self._purged_at = time.time()
+        try:
+            with self.db.transaction() as conn:
+                conn.execute('''
+                    DELETE FROM market_data WHERE item_query IN (
+                        SELECT item_query FROM market_data_fetches WHERE fetched_at < ?
+                    ) OR item_query NOT IN (SELECT item_query FROM market_data_fetches)
+                ''', (fetched_before,))
+                cursor = conn.execute('DELETE FROM market_data_fetches WHERE fetched_at < ?', (fetched_before,))
+                return cursor.rowcount
+
+        except Exception as e:
+            logging.error(f"Market data purge error: {e}")
+            return 0
+
+
+class MarketRefresher:
+    """Keeps market data for watched queries warm ahead of cache expiry"""
+
+    LEASE_NAME = 'market_refresher'
+
+    def __init__(self, analyzer: 'EnhancedVintedAnalyzer', db: Database):
+        self.analyzer = analyzer
+        self.db = db
+        self.owner = f"{os.getpid()}:{random.getrandbits(32):08x}"
+        self._hits = {}
+        self._hits_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshed = 0
+
+    def watch(self, query: str) -> Optional[Dict]:
+        """Add a watcher to a query, or return None if the watchlist is full"""
+        now = time.time()
+        with self.db.transaction() as conn:
+            # Every watched query costs scrapes, so new ones are refused once the list is full
+            known = conn.execute('SELECT 1 FROM watched_markets WHERE item_query = ?', (query,)).fetchone()
+            if not known:
+                size = conn.execute('SELECT COUNT(*) FROM watched_markets').fetchone()[0]
+                if size >= WATCHLIST_MAX_QUERIES:
+                    return None
+            conn.execute('''
+                INSERT INTO watched_markets (item_query, watchers, created_at, last_active_at)
+                VALUES (?, 1, ?, ?)
+                ON CONFLICT(item_query) DO UPDATE SET
+                    watchers = watchers + 1,
+                    last_active_at = excluded.last_active_at
+            ''', (query, now, now))
+        return self.get(query)
+
+    def unwatch(self, query: str) -> bool:
+        """Remove a watcher from a query, dropping it once nobody watches it"""
+        with self.db.transaction() as conn:
+            cursor = conn.execute(
+                'UPDATE watched_markets SET watchers = watchers - 1 WHERE item_query = ?', (query,)
+            )
+            updated = cursor.rowcount
+            conn.execute('DELETE FROM watched_markets WHERE item_query = ? AND watchers <= 0', (query,))
+        return updated > 0
+
+    def get(self, query: str) -> Optional[Dict]:
+        """Return one watched query with its freshness"""
+        matches = [item for item in self.list() if item['item_query'] == query]
+        return matches[0] if matches else None
+
+    def list(self) -> List[Dict]:
+        """Return all watched queries with popularity and data age"""
+        rows = self.db.fetchall('''
+            SELECT w.item_query, w.watchers, w.hits, f.fetched_at
+            FROM watched_markets w
+            LEFT JOIN market_data_fetches f ON f.item_query = w.item_query
+            ORDER BY w.watchers + w.hits DESC
+        ''')
+
+        now = time.time()
+        return [{
+            'item_query': item_query,
+            'watchers': watchers,
+            'popularity': round(hits, 2),
+            'data_age_seconds': round(now - fetched_at) if fetched_at else None
+        } for item_query, watchers, hits, fetched_at in rows]
+
+    def record_request(self, query: str):
+        """Count a lookup towards a query's popularity"""
+        # Counts are only drained by tick(), so without the loop they would pile up
+        if self._thread is None:
+            return
+        with self._hits_lock:
+            if query in self._hits or len(self._hits) < REFRESH_MAX_PENDING_HITS:
+                self._hits[query] = self._hits.get(query, 0) + 1
+
+    def start(self):
+        """Start the refresh loop in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='market-refresher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(REFRESH_TICK_SECONDS):
+            try:
+                self.tick()
+            except Exception as e:
+                logging.error(f"Market refresher error: {e}")
+
+    def tick(self):
+        """Refresh the most popular and oldest watched queries that are about to expire"""
+        self._flush_hits()
+
+        # Only one worker refreshes at a time; the rest read the shared store
+        if not self._acquire_lease():
+            return
+
+        self._decay_hits()
+        self._expire_idle()
+        for query in self._due_queries():
+            if self._stop.is_set():
+                break
+
+            self.analyzer._refresh_sold_listings(query)
+            self.analyzer.market_trends_cache.invalidate(query)
+            self.refreshed += 1
+            time.sleep(REFRESH_MIN_INTERVAL)
+
+    def _due_queries(self) -> List[str]:
+        """Watched queries whose data expires soon, highest priority first"""
+        rows = self.db.fetchall('''
+            SELECT w.item_query, w.watchers + w.hits, f.fetched_at
+            FROM watched_markets w
+            LEFT JOIN market_data_fetches f ON f.item_query = w.item_query
+        ''')
+
+        now = time.time()
+        due = []
+        for item_query, popularity, fetched_at in rows:
+            age = now - fetched_at if fetched_at else SOLD_LISTINGS_TTL
+            if age >= SOLD_LISTINGS_TTL - REFRESH_AHEAD_SECONDS:
+                # Popular queries first, and among those the stalest
+                due.append(((1 + popularity) * age / SOLD_LISTINGS_TTL, item_query))
+
+        due.sort(reverse=True)
+        return [item_query for _, item_query in due[:REFRESH_BATCH_SIZE]]
+
+    def _flush_hits(self):
+        """Add this worker's recent lookups to the popularity of watched queries"""
+        with self._hits_lock:
+            hits, self._hits = self._hits, {}
+        if not hits:
+            return
+
+        with self.db.transaction() as conn:
+            now = time.time()
+            conn.executemany(
+                'UPDATE watched_markets SET hits = hits + ?, last_active_at = ? WHERE item_query = ?',
+                [(count, now, query) for query, count in hits.items()]
+            )
+
+    def _decay_hits(self):
+        """Age popularity once per tick; only the lease holder does this, however many workers run"""
+        with self.db.transaction() as conn:
+            conn.execute('UPDATE watched_markets SET hits = hits * 0.9')
+
+    def _expire_idle(self):
+        """Drop watches whose popularity has decayed away and that nobody has touched lately"""
+        with self.db.transaction() as conn:
+            conn.execute(
+                'DELETE FROM watched_markets WHERE hits < ? AND last_active_at < ?',
+                (WATCH_MIN_POPULARITY, time.time() - WATCH_IDLE_SECONDS)
+            )
+
+    def _acquire_lease(self) -> bool:
+        """Take or renew the refresher lease shared by all workers"""
+        now = time.time()
+        with self.db.transaction() as conn:
+            conn.execute('''
+                INSERT INTO scheduler_leases (name, owner, expires_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE scheduler_leases.owner = excluded.owner OR scheduler_leases.expires_at < ?
+            ''', (self.LEASE_NAME, self.owner, now + REFRESH_TICK_SECONDS * 2, now))
+            cursor = conn.execute('SELECT owner FROM scheduler_leases WHERE name = ?', (self.LEASE_NAME,))
+            owner = cursor.fetchone()[0]
+        return owner == self.owner
+
+
+# Keyword tables shared by text analysis and price estimation. Within a group
+# earlier entries win, matching the order the analyzer used to test them in.
+CONDITION_KEYWORDS = [
+    ('new without tags', 'New without tags'),
+    ('new with tags', 'New with tags'),
+    ('new', 'New'),
+    ('excellent', 'Excellent'),
+    ('very good', 'Very good'),
+    ('good', 'Good'),
+    ('satisfactory', 'Satisfactory')
+]
+CONDITION_PRICE_FACTORS = [
+    (('new', 'unused', 'tags'), 1.3),
+    (('excellent', 'mint'), 1.1),
+    (('poor', 'damaged', 'worn'), 0.7)
+]
+SEASONAL_KEYWORDS = {
+    'winter_demand': ['coat', 'jacket', 'parka', 'boots', 'scarf'],
+    'winter_slump': ['shorts', 'sandals', 'bikini'],
+    'summer_demand': ['shorts', 'sandals', 'bikini', 'dress'],
+    'summer_slump': ['coat', 'jacket', 'parka', 'boots']
+}
+KEYWORD_MATCH_CACHE_SIZE = 2048
+
+SIZE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'size\s+([A-Z0-9]+)',
+    r'([A-Z]\d+)',
+    r'(\d+[A-Z])',
+    r'(XS|S|M|L|XL|XXL)',
+    r'(UK\s*\d+)',
+    r'(EU\s*\d+)',
+    r'(US\s*\d+)'
+)]
+VIEWS_PATTERN = re.compile(r'views?\s+(\d+)', re.IGNORECASE)
+UPLOAD_TIME_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(\d+)\s*min\s*ago',
+    r'(\d+)\s*hour[s]?\s*ago',
+    r'(\d+)\s*day[s]?\s*ago',
+    r'(\d+)\s*week[s]?\s*ago',
+    r'(\d+)\s*month[s]?\s*ago'
+)]
+
+
+class KeywordMatches:
+    """Keyword hits from one scan, as (start, group, priority, value) tuples"""
+
+    __slots__ = ('text', 'hits')
+
+    def __init__(self, text: str, hits: List[Tuple[int, str, int, Any]]):
+        self.text = text
+        self.hits = hits
+
+    def found(self, group: str) -> bool:
+        return any(hit[1] == group for hit in self.hits)
+
+    def best(self, group: str, start: int = 0, end: Optional[int] = None) -> Optional[Any]:
+        """Value of the highest priority keyword of a group found within text[start:end]"""
+        end = len(self.text) if end is None else end
+        best = None
+        for hit_start, hit_group, priority, value in self.hits:
+            if hit_group == group and start <= hit_start < end and (best is None or priority < best[0]):
+                best = (priority, value)
+        return best[1] if best else None
+
+    def best_on_last_line(self, group: str) -> Optional[Any]:
+        """Like ``best``, restricted to the last line with a hit in the group"""
+        starts = [hit[0] for hit in self.hits if hit[1] == group]
+        if not starts:
+            return None
+        last = max(starts)
+        end = self.text.find('\n', last)
+        return self.best(group, self.text.rfind('\n', 0, last) + 1, end if end != -1 else len(self.text))
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over every keyword dictionary the analyzer uses.
+
+    One pass over the lowercased text finds every occurrence of every keyword,
+    including overlapping ones ("new" inside "new with tags"), so the cost
+    grows with the text rather than with the number of brands and categories.
+    Matching is by substring, as the original ``in`` checks were.
+    """
+
+    def __init__(self, groups: Dict[str, Iterable[Tuple[str, Any]]]):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for group, entries in groups.items():
+            for priority, (keyword, value) in enumerate(entries):
+                keyword = keyword.lower()
+                self._add(keyword, (len(keyword), group, priority, value))
+        self._link()
+
+        # Queries are rescored by several analysis stages
+        self.match = functools.lru_cache(maxsize=KEYWORD_MATCH_CACHE_SIZE)(self.scan)
+
+    def _add(self, keyword: str, output: Tuple[int, str, int, Any]):
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state].append(output)
+
+    def _link(self):
+        # Breadth first, so each failure target is linked before it is used
+        pending = list(self._goto[0].values())
+        for state in pending:
+            for ch, nxt in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                pending.append(nxt)
+
+    def scan(self, text: str) -> KeywordMatches:
+        """Find every keyword in text, case-insensitively"""
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for length, group, priority, value in out[state]:
+                    hits.append((i - length + 1, group, priority, value))
+        return KeywordMatches(text, hits)
+
+
+class BrandIndex:
+    """Autocomplete index over brand names and their aliases.
+
+    Every word-start suffix of each name and alias ("north face", "face") is
+    kept in one sorted list, so a prefix lookup is two bisects whatever the
+    catalog size. When the prefix matches do not fill the page, matches inside
+    a word are looked for among the terms sharing the query's rarest trigram,
+    so queries shorter than three characters only get prefix matches. Results
+    are ranked by popularity, then catalog order, and cached per normalized query.
+    """
+
+    def __init__(self, brands: Iterable[Tuple[str, float, Iterable[str]]],
+                 cache_size: int = BRAND_SUGGESTION_CACHE_SIZE):
+        self.names = []
+        self._rank = []
+        self._terms = []  # (term, brand_id) for the substring fallback
+        keys = []
+        for brand_id, (name, popularity, aliases) in enumerate(brands):
+            self.names.append(name)
+            self._rank.append((-popularity, brand_id))
+            for term in {self.normalize(term) for term in (name, *aliases)}:
+                self._terms.append((term, brand_id))
+                words = term.split()
+                keys.extend((' '.join(words[i:]), brand_id) for i in range(len(words)))
+        keys.sort()
+        self._grams = {}  # trigram -> indexes into _terms
+        for term_index, (term, _) in enumerate(self._terms):
+            for gram in {term[i:i + 3] for i in range(len(term) - 2)}:
+                self._grams.setdefault(gram, []).append(term_index)
+        self._keys = [key for key, _ in keys]
+        self._brand_ids = [brand_id for _, brand_id in keys]
+        self.cache = LRUCache(max_size=cache_size)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return ' '.join(text.lower().split())
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def suggest(self, query: str, limit: int = BRAND_SUGGESTION_LIMIT) -> List[str]:
+        key = self.normalize(query)
+        return self.cache.get_or_compute((key, limit), lambda: self._lookup(key, limit))
+
+    def _lookup(self, key: str, limit: int) -> List[str]:
+        lo = bisect.bisect_left(self._keys, key)
+        hi = bisect.bisect_left(self._keys, key + '￿', lo)
+        matches = sorted(set(self._brand_ids[lo:hi]), key=self._rank.__getitem__)
+
+        if len(matches) < limit and len(key) >= 3:
+            # Fall back to matches inside a word ("ace" -> "North Face"); a term
+            # containing the key contains its rarest trigram too
+            candidates = min((self._grams.get(key[i:i + 3], ()) for i in range(len(key) - 2)), key=len)
+            found = set(matches)
+            inner = {brand_id for term, brand_id in map(self._terms.__getitem__, candidates)
+                     if brand_id not in found and key in term}
+            matches.extend(heapq.nsmallest(limit - len(matches), inner, key=self._rank.__getitem__))
+
+        return [self.names[brand_id] for brand_id in matches[:limit]]
+
+
+class Catalog:
+    """Immutable snapshot of the brand and category catalog with its lookup indexes"""
+
+    def __init__(self, brands: Dict[str, Dict], categories: Dict[str, Dict], autocomplete: List[Dict]):
+        self.brands_data = MappingProxyType(dict(brands))
+        self.item_categories = MappingProxyType(dict(categories))
+        self.common_brands = tuple(entry['name'] for entry in autocomplete)
+
+        # Entries without a popularity rank by their position in the file
+        self.brand_index = BrandIndex(
+            (entry['name'], entry.get('popularity', len(autocomplete) - rank), entry.get('aliases', ()))
+            for rank, entry in enumerate(autocomplete)
+        )
+
+        # Brand, category, condition and seasonal keywords, matched in one pass
+        groups = {
+            'brand': [(brand, brand) for brand in self.brands_data],
+            'category': [(category, category) for category in self.item_categories],
+            'common_brand': [(brand, brand) for brand in self.common_brands],
+            'condition': CONDITION_KEYWORDS,
+            'condition_price': [(keyword, factor) for keywords, factor in CONDITION_PRICE_FACTORS
+                                for keyword in keywords]
         }
+        for group, keywords in SEASONAL_KEYWORDS.items():
+            groups[group] = [(keyword, keyword) for keyword in keywords]
+        self.keyword_matcher = KeywordMatcher(groups)
+
+    @classmethod
+    def load(cls, path: str) -> 'Catalog':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('brands', {}), data.get('categories', {}), data.get('autocomplete', []))
+
+
+class CatalogReloader:
+    """Holds the current catalog and swaps in a rebuilt one when the file changes.
+
+    Readers take ``current`` once per operation and never lock; a reload
+    builds the new snapshot off to the side and replaces the reference in a
+    single assignment. A file that fails to load leaves the old snapshot in
+    place.
+    """
+
+    def __init__(self, path: str, poll_interval: float = CATALOG_POLL_SECONDS):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.current = Catalog({}, {}, [])
+        self.reloads = 0
+        self._signature = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.check()
+
+    def check(self) -> bool:
+        """Reload the catalog if the file changed since the last attempt"""
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            # Log once per disappearance rather than on every poll
+            if self._signature != 'missing':
+                logging.error(f"Catalog unavailable: {e}")
+            self._signature = 'missing'
+            return False
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return False
+        self._signature = signature
 
-        # Common brands for autocomplete
-        self.common_brands = [
-            "Nike", "Adidas", "Puma", "New Balance", "Converse", "Vans", 
-            "River Island", "Zara", "H&M", "ASOS", "Topman", "Next",
-            "Ralph Lauren", "Tommy Hilfiger", "Calvin Klein", "Lacoste",
-            "North Face", "Patagonia", "Supreme", "Champion", "Carhartt",
-            "Gucci", "Prada", "Balenciaga", "Louis Vuitton", "Versace",
-            "Off-White", "Stone Island", "Moncler", "Canada Goose"
-        ]
+        try:
+            catalog = Catalog.load(self.path)
+        except Exception as e:
+            logging.error(f"Catalog reload error: {e}")
+            return False
+
+        self.current = catalog
+        self.reloads += 1
+        logging.info(f"Loaded catalog with {len(catalog.brands_data)} brands, "
+                     f"{len(catalog.item_categories)} categories, {len(catalog.brand_index)} autocomplete entries")
+        return True
+
+    def start(self):
+        """Start polling for changes in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='catalog-reloader', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                logging.error(f"Catalog reloader error: {e}")
+
+
+class EnhancedVintedAnalyzer:
+    def __init__(self, db_path: str = DB_PATH, catalog_path: str = CATALOG_PATH):
+        # Heavy subsystems (catalog, HTTP pool, worker threads, schema) are
+        # built on first use, so importing the app stays cheap and a
+        # preloading server can fork workers before any of them exist
+        self.catalog_path = catalog_path
+        
+        # Strategy success rates, loaded from strategy_stats on first read and
+        # every STRATEGY_RATES_TTL after (see get_strategy_success_rates)
+        self.strategy_success_rates = {}
+        self.strategy_rates_loaded_at = 0.0
+        self.strategy_rates_version = 0
         
-        # Initialize database for learning
-        self._init_database()
+        # Database for learning and caching; migrated on first connection
+        self.db = Database(db_path)
+        
+        # Learning writes are acknowledged immediately and committed in batches
+        self.write_queue = WriteBehindQueue(self.db, batch_size=WRITE_BEHIND_BATCH_SIZE,
+                                            flush_interval=WRITE_BEHIND_FLUSH_INTERVAL,
+                                            max_depth=WRITE_BEHIND_MAX_DEPTH)
         
         # Market trends cache
-        self.market_trends_cache = {}
-        self.cache_timestamp = {}
+        self.market_trends_cache = LRUCache(max_size=MARKET_TRENDS_CACHE_SIZE, ttl=MARKET_TRENDS_TTL)
         
-        # Strategy success rates (loaded from database)
-        self.strategy_success_rates = {}
+        # Parsed eBay sold listings, fetched once per query
+        self.sold_listings_cache = LRUCache(max_size=SOLD_LISTINGS_CACHE_SIZE, ttl=SOLD_LISTINGS_TTL)
+        
+        # Seller profiles, including "no such seller" results
+        self.seller_profiles_cache = LRUCache(max_size=SELLER_PROFILE_CACHE_SIZE, ttl=SELLER_PROFILE_TTL)
+        
+        # Finished strategies, keyed by their inputs and the versions of the data behind them
+        self.strategy_cache = LRUCache(max_size=STRATEGY_CACHE_SIZE, ttl=STRATEGY_CACHE_TTL)
+        
+        # When each query's market data in use was scraped, the same in every worker
+        self.market_data_versions = LRUCache(max_size=SOLD_LISTINGS_CACHE_SIZE * 4,
+                                             ttl=SOLD_LISTINGS_TTL + SOLD_LISTINGS_STALE_TTL)
+        
+        # Persistent market data shared across workers and restarts
+        self.market_store = MarketDataStore(self.db)
+        
+        # Concurrent lookups for the same query share one scrape
+        self.sold_listings_flight = SingleFlight()
+        
+        # (consecutive failed scrapes, retry time) per query; kept past the retry
+        # time so the next failure backs off for longer
+        self.refresh_failures = LRUCache(max_size=SOLD_LISTINGS_CACHE_SIZE, ttl=REFRESH_FAILURE_MAX_BACKOFF * 2)
+        
+        # Server-side watchlist kept warm in the background
+        self.refresher = MarketRefresher(self, self.db)
 
-    def _init_database(self):
-        """Initialize SQLite database for learning and caching"""
-        try:
-            conn = sqlite3.connect('vinted_analyzer.db')
-            cursor = conn.cursor()
-            
-            # Create tables
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS negotiations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    item_name TEXT,
-                    original_price REAL,
-                    offered_price REAL,
-                    strategy_used TEXT,
-                    outcome TEXT,
-                    seller_response_time INTEGER,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS market_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    item_query TEXT,
-                    platform TEXT,
-                    price REAL,
-                    condition TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS seller_profiles (
-                    seller_id TEXT PRIMARY KEY,
-                    avg_response_time REAL,
-                    negotiation_flexibility REAL,
-                    listing_count INTEGER,
-                    account_age_days INTEGER,
-                    feedback_score REAL,
-                    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
-            
-            # Load strategy success rates
-            self._update_strategy_success_rates()
-            
-        except Exception as e:
-            logging.error(f"Database initialization error: {e}")
+    @lazy_attribute
+    def catalog(self) -> CatalogReloader:
+        """Brands, categories and autocomplete entries, reloaded when the file changes"""
+        return CatalogReloader(self.catalog_path)
+
+    @lazy_attribute
+    def http(self) -> HTTPClient:
+        """Pooled keep-alive connections for scrapers"""
+        return HTTPClient(pool_size=HTTP_POOL_SIZE, per_host_limit=HTTP_PER_HOST_LIMIT,
+                          max_retries=HTTP_MAX_RETRIES)
+
+    @lazy_attribute
+    def executor(self) -> ThreadPoolExecutor:
+        """Worker threads for the concurrent analysis pipeline"""
+        return ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix='analysis')
+
+    @lazy_attribute
+    def batch_executor(self) -> ThreadPoolExecutor:
+        """Worker threads for /api/analyze-batch query groups"""
+        return ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch')
+
+    def warm(self):
+        """Migrate the schema and load the catalog now rather than on first use.
+
+        Called in a preloading server's master process, so workers fork with
+        the schema checked and the catalog indexes already built.
+        """
+        self.db.ensure_schema()
+        self.catalog
+
+    @property
+    def brands_data(self) -> Dict[str, Dict]:
+        return self.catalog.current.brands_data
+
+    @property
+    def item_categories(self) -> Dict[str, Dict]:
+        return self.catalog.current.item_categories
+
+    @property
+    def common_brands(self) -> Tuple[str, ...]:
+        return self.catalog.current.common_brands
 
     def get_brand_suggestions(self, query: str) -> List[str]:
         """Get brand suggestions for autocomplete"""
-        if not query or len(query) < 2:
+        if not query or len(query.strip()) < 2:
             return []
         
-        query_lower = query.lower()
-        suggestions = []
-        
-        for brand in self.common_brands:
-            if query_lower in brand.lower():
-                suggestions.append(brand)
-        
-        return suggestions[:8]  # Increased to 8 suggestions
+        return self.catalog.current.brand_index.suggest(query)
 
     def parse_time_string(self, time_str: str) -> int:
         """Parse time strings like '27 min ago', '2 hours ago', '3 days ago'"""
@@ -219,66 +2047,33 @@ class EnhancedVintedAnalyzer:
         """Analyze text extracted from screenshot"""
         lines = text_content.split('\n')
         extracted_data = {}
+        matches = self.catalog.current.keyword_matcher.scan(text_content)
         
-        # Look for brand names
-        for line in lines:
-            line_lower = line.lower().strip()
-            for brand in self.common_brands:
-                if brand.lower() in line_lower:
-                    extracted_data['brand'] = brand
-                    break
+        # Look for brand names (the last line naming a brand wins)
+        brand = matches.best_on_last_line('common_brand')
+        if brand:
+            extracted_data['brand'] = brand
         
-        # Look for size information
-        size_patterns = [
-            r'size\s+([A-Z0-9]+)',
-            r'([A-Z]\d+)',
-            r'(\d+[A-Z])',
-            r'(XS|S|M|L|XL|XXL)',
-            r'(UK\s*\d+)',
-            r'(EU\s*\d+)',
-            r'(US\s*\d+)'
-        ]
-        
-        for line in lines:
-            for pattern in size_patterns:
-                match = re.search(pattern, line, re.IGNORECASE)
-                if match:
-                    extracted_data['size'] = match.group(1)
-                    break
+        # Look for size information (the last line mentioning a size wins)
+        for line in reversed(lines):
+            match = next(filter(None, (pattern.search(line) for pattern in SIZE_PATTERNS)), None)
+            if match:
+                extracted_data['size'] = match.group(1)
+                break
         
         # Look for condition
-        condition_keywords = {
-            'new without tags': 'New without tags',
-            'new with tags': 'New with tags', 
-            'new': 'New',
-            'excellent': 'Excellent',
-            'very good': 'Very good',
-            'good': 'Good',
-            'satisfactory': 'Satisfactory'
-        }
-        
-        text_lower = text_content.lower()
-        for keyword, condition in condition_keywords.items():
-            if keyword in text_lower:
-                extracted_data['condition'] = condition
-                break
+        condition = matches.best('condition')
+        if condition:
+            extracted_data['condition'] = condition
         
         # Look for views
-        view_match = re.search(r'views?\s+(\d+)', text_content, re.IGNORECASE)
+        view_match = VIEWS_PATTERN.search(text_content)
         if view_match:
             extracted_data['views'] = int(view_match.group(1))
         
         # Look for time information
-        time_patterns = [
-            r'(\d+)\s*min\s*ago',
-            r'(\d+)\s*hour[s]?\s*ago', 
-            r'(\d+)\s*day[s]?\s*ago',
-            r'(\d+)\s*week[s]?\s*ago',
-            r'(\d+)\s*month[s]?\s*ago'
-        ]
-        
-        for pattern in time_patterns:
-            match = re.search(pattern, text_content, re.IGNORECASE)
+        for pattern in UPLOAD_TIME_PATTERNS:
+            match = pattern.search(text_content)
             if match:
                 extracted_data['upload_time'] = self.parse_time_string(match.group(0))
                 break
@@ -294,83 +2089,34 @@ class EnhancedVintedAnalyzer:
     def get_seasonal_factor(self, item_name: str) -> float:
         """Calculate seasonal pricing factor"""
         current_month = datetime.now().month
-        item_lower = item_name.lower()
+        matches = self.catalog.current.keyword_matcher.match(item_name)
         
         # Winter items (Nov-Feb)
         if current_month in [11, 12, 1, 2]:
-            if any(word in item_lower for word in ['coat', 'jacket', 'parka', 'boots', 'scarf']):
+            if matches.found('winter_demand'):
                 return 1.25
-            elif any(word in item_lower for word in ['shorts', 'sandals', 'bikini']):
+            elif matches.found('winter_slump'):
                 return 0.75
                 
         # Summer items (May-Aug)
         elif current_month in [5, 6, 7, 8]:
-            if any(word in item_lower for word in ['shorts', 'sandals', 'bikini', 'dress']):
+            if matches.found('summer_demand'):
                 return 1.15
-            elif any(word in item_lower for word in ['coat', 'jacket', 'parka', 'boots']):
+            elif matches.found('summer_slump'):
                 return 0.8
                 
         return 1.0  # No seasonal adjustment
 
+    @STAGE_SECONDS.labels(stage='market_trends').time()
     def analyze_market_trends(self, query: str) -> Dict:
         """Analyze market trends and momentum"""
-        cache_key = query.lower()
-        
-        # Check cache (valid for 1 hour)
-        if cache_key in self.market_trends_cache:
-            if time.time() - self.cache_timestamp[cache_key] < 3600:
-                return self.market_trends_cache[cache_key]
+        cache_key = self._normalize_query(query)
+        self.refresher.record_request(cache_key)
         
         try:
-            # Get price data from last 90 days
-            historical_prices = self._fetch_historical_prices(query, days=90)
-            
-            if len(historical_prices) < 3:
-                trend_data = {
-                    'price_trend': 'stable',
-                    'trend_strength': 0.0,
-                    'demand_surge': False,
-                    'seasonal_factor': self.get_seasonal_factor(query),
-                    'hype_score': 0.5,
-                    'data_sources': 1,
-                    'estimated_market_price': self._estimate_from_keywords(query)
-                }
-            else:
-                # Calculate trend
-                recent_prices = [p.price for p in historical_prices[:10]]  # Last 10 sales
-                older_prices = [p.price for p in historical_prices[-10:]]   # 10 sales from 90 days ago
-                
-                recent_avg = statistics.mean(recent_prices)
-                older_avg = statistics.mean(older_prices)
-                
-                price_change = (recent_avg - older_avg) / older_avg
-                
-                if price_change > 0.1:
-                    trend = 'rising'
-                elif price_change < -0.1:
-                    trend = 'declining'
-                else:
-                    trend = 'stable'
-                
-                # Check for demand surge (increased frequency of sales)
-                recent_sales_count = len([p for p in historical_prices if p.days_ago <= 7])
-                demand_surge = recent_sales_count > len(historical_prices) * 0.3
-                
-                trend_data = {
-                    'price_trend': trend,
-                    'trend_strength': abs(price_change),
-                    'demand_surge': demand_surge,
-                    'seasonal_factor': self.get_seasonal_factor(query),
-                    'hype_score': min(1.0, abs(price_change) * 2 + (0.5 if demand_surge else 0)),
-                    'data_sources': 2,  # eBay + estimated others
-                    'estimated_market_price': recent_avg
-                }
-            
-            # Cache the result
-            self.market_trends_cache[cache_key] = trend_data
-            self.cache_timestamp[cache_key] = time.time()
-            
-            return trend_data
+            return self.market_trends_cache.get_or_compute(
+                cache_key, lambda: self._compute_market_trends(query)
+            )
             
         except Exception as e:
             logging.error(f"Market trend analysis error: {e}")
@@ -384,115 +2130,250 @@ class EnhancedVintedAnalyzer:
                 'estimated_market_price': self._estimate_from_keywords(query)
             }
 
-    def _fetch_historical_prices(self, query: str, days: int = 90) -> List[MarketDataPoint]:
+    def _compute_market_trends(self, query: str) -> Dict:
+        """Compute trend data from historical prices"""
+        # Get price data from last 90 days
+        historical_prices = self._fetch_historical_prices(query, days=90)
+        
+        if len(historical_prices) < 3:
+            return self._default_market_trends(query)
+        
+        series = historical_prices.price_series()
+        
+        # Calculate trend
+        recent_avg = series.head(10).mean()  # Last 10 sales
+        older_avg = series.tail(10).mean()   # 10 sales from 90 days ago
+        
+        price_change = (recent_avg - older_avg) / older_avg
+        
+        if price_change > 0.1:
+            trend = 'rising'
+        elif price_change < -0.1:
+            trend = 'declining'
+        else:
+            trend = 'stable'
+        
+        # Check for demand surge (increased frequency of sales)
+        recent_sales_count = series.count_within(7)
+        demand_surge = recent_sales_count > len(series) * 0.3
+        
+        return {
+            'price_trend': trend,
+            'trend_strength': abs(price_change),
+            'demand_surge': demand_surge,
+            'seasonal_factor': self.get_seasonal_factor(query),
+            'hype_score': min(1.0, abs(price_change) * 2 + (0.5 if demand_surge else 0)),
+            'data_sources': 2,  # eBay + estimated others
+            'estimated_market_price': recent_avg
+        }
+
+    def _default_market_trends(self, query: str) -> Dict:
+        """Neutral trend data used when there is not enough price history"""
+        return {
+            'price_trend': 'stable',
+            'trend_strength': 0.0,
+            'demand_surge': False,
+            'seasonal_factor': self.get_seasonal_factor(query),
+            'hype_score': 0.5,
+            'data_sources': 1,
+            'estimated_market_price': self._estimate_from_keywords(query)
+        }
+
+    @STAGE_SECONDS.labels(stage='fetch_historical_prices').time()
+    def _fetch_historical_prices(self, query: str, days: int = 90) -> MarketSeries:
         """Fetch historical price data"""
+        return self._fetch_sold_listings(query).within_days(days)
+
+    def _fetch_sold_listings(self, query: str) -> MarketSeries:
+        """Fetch and parse eBay sold listings once, shared by price and trend analysis"""
+        cache_key = self._normalize_query(query)
+
+        listings = self.sold_listings_cache.get(cache_key)
+        if listings is not None:
+            return listings
+
+        # Another worker may already have scraped this query
+        stored = self.market_store.load(cache_key)
+        if stored:
+            listings, fetched_at = stored
+            age = time.time() - fetched_at
+
+            if age < SOLD_LISTINGS_TTL:
+                self.sold_listings_cache.set(cache_key, listings, ttl=SOLD_LISTINGS_TTL - age)
+                self.market_data_versions.set(cache_key, fetched_at)
+                return listings
+
+            if age < SOLD_LISTINGS_TTL + SOLD_LISTINGS_STALE_TTL:
+                # Serve stale data now and refresh it in the background. Holding it
+                # briefly spares the store a read per request while the refresh runs
+                self.sold_listings_cache.set(cache_key, listings, ttl=SOLD_LISTINGS_STALE_RECHECK)
+                self.market_data_versions.set(cache_key, fetched_at)
+                self._schedule_sold_listings_refresh(cache_key)
+                return listings
+
+        listings = self._refresh_sold_listings(cache_key)
+        return listings if listings is not None else MarketSeries()
+
+    def _schedule_sold_listings_refresh(self, query: str):
+        """Refresh a query in a background thread unless one is running or recently failed"""
+        if self.sold_listings_flight.in_flight(query):
+            return
+        failures, retry_at = self.refresh_failures.get(query, (0, 0.0))
+        if time.time() < retry_at:
+            return
+
+        threading.Thread(target=self._refresh_sold_listings, args=(query,), daemon=True).start()
+
+    def _refresh_sold_listings(self, query: str) -> Optional[MarketSeries]:
+        """Scrape sold listings and update both the local cache and the shared store"""
+        def scrape():
+            listings = self._scrape_sold_listings(query)
+            if listings is None:
+                failures = self.refresh_failures.get(query, (0, 0.0))[0] + 1
+                backoff = min(REFRESH_FAILURE_BACKOFF * 2 ** (failures - 1), REFRESH_FAILURE_MAX_BACKOFF)
+                self.refresh_failures.set(query, (failures, time.time() + backoff))
+                return None
+            self.refresh_failures.invalidate(query)
+
+            fetched_at = time.time()
+            self.sold_listings_cache.set(query, listings)
+            self.market_store.save(query, listings, fetched_at)
+            self.market_data_versions.set(query, fetched_at)
+            return listings
+
+        return self.sold_listings_flight.do(query, scrape)
+
+    @STAGE_SECONDS.labels(stage='scrape').time()
+    def _scrape_sold_listings(self, query: str) -> Optional[MarketSeries]:
+        """Download eBay sold listings, returning None if the request fails"""
         try:
-            # eBay sold listings with date filtering
-            url = f"https://www.ebay.co.uk/sch/i.html?_nkw={query.replace(' ', '+')}&_sop=13&LH_Sold=1&LH_Complete=1"
+            url = f"{EBAY_BASE_URL}/sch/i.html?_nkw={query.replace(' ', '+')}&_sop=13&LH_Sold=1&LH_Complete=1"
             headers = {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
             }
-            
-            response = requests.get(url, headers=headers, timeout=15)
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            historical_data = []
-            for item in soup.select(".s-item")[:50]:  # Get more data for trends
-                try:
-                    if "Shop on eBay" in item.text:
-                        continue
-                        
-                    price_tag = item.select_one(".s-item__price")
-                    date_tag = item.select_one(".s-item__endedDate")
-                    
-                    if not price_tag:
-                        continue
-                    
-                    price = self._extract_price(price_tag.text.strip())
-                    if not price or price < 5 or price > 2000:
-                        continue
-                    
-                    # Extract days ago (simplified)
-                    days_ago = 0
-                    if date_tag:
-                        date_text = date_tag.text.strip()
-                        # Simple date parsing - could be enhanced
-                        if 'day' in date_text:
-                            match = re.search(r'(\d+)', date_text)
-                            if match:
-                                days_ago = int(match.group(1))
-                    
-                    historical_data.append(MarketDataPoint(
-                        price=price,
-                        platform='ebay',
-                        condition='unknown',
-                        days_ago=days_ago
-                    ))
-                        
-                except Exception:
-                    continue
-            
-            return historical_data
-            
+
+            response = self.http.get(url, headers=headers, timeout=15)
+            response.raise_for_status()
+            return self._parse_sold_listings(response.text)
+
         except Exception as e:
-            logging.error(f"Error fetching historical prices: {e}")
-            return []
+            UPSTREAM_ERRORS.inc(error=type(e).__name__)
+            logging.error(f"Error fetching sold listings: {e}")
+            return None
+
+    @STAGE_SECONDS.labels(stage='parse').time()
+    def _parse_sold_listings(self, html: str, limit: int = SOLD_LISTINGS_LIMIT) -> MarketSeries:
+        """Parse an eBay sold listings page into dated market data points"""
+        listings = MarketSeries()
+        for card_text, price_text, date_text in SoldListingsParser.extract(html, limit):
+            try:
+                if "Shop on eBay" in card_text:
+                    continue
+
+                if price_text is None:
+                    continue
+
+                price = self._extract_price(price_text.strip())
+                if not price or price < 5 or price > 2000:
+                    continue
+
+                # Extract days ago (simplified)
+                days_ago = 0
+                if date_text is not None:
+                    date_text = date_text.strip()
+                    # Simple date parsing - could be enhanced
+                    if 'day' in date_text:
+                        match = re.search(r'(\d+)', date_text)
+                        if match:
+                            days_ago = int(match.group(1))
+
+                listings.append(price, 'ebay', 'unknown', days_ago)
+
+            except Exception:
+                continue
+
+        return listings
+
+    def market_data_version(self, query: str) -> float:
+        """Scrape time of the normalized query's market data in use, 0 if none is loaded"""
+        return self.market_data_versions.get(query, 0.0)
+
+    def _normalize_query(self, query: str) -> str:
+        """Normalize a search query into a cache key"""
+        return ' '.join(query.lower().split())
 
+    @STAGE_SECONDS.labels(stage='seller_profile').time()
     def analyze_seller_profile(self, seller_data: Dict) -> SellerProfile:
         """Enhanced seller profiling"""
         try:
             # Extract seller info from listing data
-            seller_id = seller_data.get('seller_id', 'unknown')
+            seller_id = seller_data.get('seller_id') or 'unknown'
             
-            # Check database for existing profile
-            conn = sqlite3.connect('vinted_analyzer.db')
-            cursor = conn.cursor()
+            cached = self.seller_profiles_cache.get(seller_id)
+            if cached is None:
+                cached = self._load_seller_profile(seller_id)
+            if cached is not NO_SELLER_PROFILE:
+                return cached
             
-            cursor.execute('SELECT * FROM seller_profiles WHERE seller_id = ?', (seller_id,))
-            existing_profile = cursor.fetchone()
+            # Create new profile with defaults
+            profile = SellerProfile(
+                seller_id=seller_id,
+                avg_response_time=24.0,  # Default 24 hours
+                negotiation_flexibility=0.15,  # Default 15% flexibility
+                listing_count=seller_data.get('listing_count', 10),
+                account_age_days=seller_data.get('account_age', 365),
+                feedback_score=seller_data.get('feedback_score', 4.5)
+            )
             
-            if existing_profile:
-                profile = SellerProfile(
-                    seller_id=existing_profile[0],
-                    avg_response_time=existing_profile[1],
-                    negotiation_flexibility=existing_profile[2],
-                    listing_count=existing_profile[3],
-                    account_age_days=existing_profile[4],
-                    feedback_score=existing_profile[5]
-                )
-            else:
-                # Create new profile with defaults
-                profile = SellerProfile(
-                    seller_id=seller_id,
-                    avg_response_time=24.0,  # Default 24 hours
-                    negotiation_flexibility=0.15,  # Default 15% flexibility
-                    listing_count=seller_data.get('listing_count', 10),
-                    account_age_days=seller_data.get('account_age', 365),
-                    feedback_score=seller_data.get('feedback_score', 4.5)
-                )
-                
-                # Insert new profile
-                cursor.execute('''
-                    INSERT INTO seller_profiles 
-                    (seller_id, avg_response_time, negotiation_flexibility, listing_count, account_age_days, feedback_score)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (profile.seller_id, profile.avg_response_time, profile.negotiation_flexibility,
-                      profile.listing_count, profile.account_age_days, profile.feedback_score))
-                conn.commit()
+            # Anonymous listings all share the "unknown" id; there is nothing to store for them
+            if seller_id != 'unknown':
+                self.seller_profiles_cache.set(seller_id, profile)
+                self._save_seller_profile(profile)
             
-            conn.close()
             return profile
             
         except Exception as e:
             logging.error(f"Seller profile analysis error: {e}")
-            return SellerProfile(
-                seller_id='unknown',
-                avg_response_time=24.0,
-                negotiation_flexibility=0.15,
-                listing_count=10,
-                account_age_days=365,
-                feedback_score=4.5
-            )
+            return self._default_seller_profile()
+
+    def _load_seller_profile(self, seller_id: str) -> Any:
+        """Read a profile into the cache, caching NO_SELLER_PROFILE for sellers with no row"""
+        row = self.db.fetchone('''
+            SELECT seller_id, avg_response_time, negotiation_flexibility,
+                   listing_count, account_age_days, feedback_score
+            FROM seller_profiles WHERE seller_id = ?
+        ''', (seller_id,))
+        
+        if row is None:
+            self.seller_profiles_cache.set(seller_id, NO_SELLER_PROFILE, ttl=SELLER_PROFILE_NEGATIVE_TTL)
+            return NO_SELLER_PROFILE
+        
+        profile = SellerProfile(*row)
+        self.seller_profiles_cache.set(seller_id, profile)
+        return profile
+
+    def _save_seller_profile(self, profile: SellerProfile):
+        """Insert a new profile through the write-behind queue"""
+        def write(conn: sqlite3.Connection):
+            conn.execute('''
+                INSERT OR IGNORE INTO seller_profiles 
+                (seller_id, avg_response_time, negotiation_flexibility, listing_count, account_age_days, feedback_score)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (profile.seller_id, profile.avg_response_time, profile.negotiation_flexibility,
+                  profile.listing_count, profile.account_age_days, profile.feedback_score))
+        
+        self.write_queue.submit(write)
+
+    def _default_seller_profile(self) -> SellerProfile:
+        """Profile assumed for sellers we know nothing about"""
+        return SellerProfile(
+            seller_id='unknown',
+            avg_response_time=24.0,
+            negotiation_flexibility=0.15,
+            listing_count=10,
+            account_age_days=365,
+            feedback_score=4.5
+        )
 
     def calculate_optimal_timing(self, seller_profile: SellerProfile) -> Dict:
         """Calculate optimal timing for contact"""
@@ -529,32 +2410,21 @@ class EnhancedVintedAnalyzer:
             'urgency_window': 'high' if datetime.now().day > 25 else 'normal'  # End of month
         }
 
-    def get_multi_platform_data(self, query: str) -> List[MarketDataPoint]:
+    def get_multi_platform_data(self, query: str) -> MarketSeries:
         """Enhanced data gathering from multiple sources"""
-        all_data = []
+        all_data = MarketSeries()
         
         # eBay (existing)
         ebay_data = self._fetch_sold_prices(query)
-        for price in ebay_data:
-            all_data.append(MarketDataPoint(
-                price=price,
-                platform='ebay',
-                condition='unknown',
-                days_ago=0
-            ))
+        all_data.extend(ebay_data)
         
         # Add simulated Depop data (in real implementation, would scrape Depop)
         if len(all_data) > 0:
             # Simulate Depop prices (typically 10-15% lower than eBay)
-            avg_ebay_price = statistics.mean(ebay_data) if ebay_data else 50
+            avg_ebay_price = PriceSeries(ebay_data.prices).mean()
             depop_prices = [avg_ebay_price * 0.9, avg_ebay_price * 0.85, avg_ebay_price * 0.95]
             for price in depop_prices:
-                all_data.append(MarketDataPoint(
-                    price=price,
-                    platform='depop',
-                    condition='unknown',
-                    days_ago=0
-                ))
+                all_data.append(price, 'depop', 'unknown', 0)
         
         # Weight by platform relevance to Vinted
         platform_weights = {
@@ -564,28 +2434,16 @@ class EnhancedVintedAnalyzer:
             'facebook': 0.7
         }
         
-        # Apply weights and return
-        weighted_data = []
-        for item in all_data:
-            weight = platform_weights.get(item.platform, 0.8)
-            # Adjust price based on platform difference
-            adjusted_price = item.price * weight
-            weighted_data.append(MarketDataPoint(
-                price=adjusted_price,
-                platform=item.platform,
-                condition=item.condition,
-                days_ago=item.days_ago
-            ))
-        
-        return weighted_data
+        # Adjust prices by platform difference as they are read, without copying
+        return all_data.weighted(platform_weights, default=0.8)
 
     def learn_from_outcome(self, strategy_data: Dict, outcome: str):
         """Learn from negotiation outcomes to improve future recommendations"""
-        try:
-            conn = sqlite3.connect('vinted_analyzer.db')
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+        strategy = strategy_data.get('strategy_used') or ''
+        seller_id = strategy_data.get('seller_id') or 'unknown'
+        
+        def write(conn: sqlite3.Connection) -> Tuple[Tuple[int, int], Optional[SellerProfile]]:
+            conn.execute('''
                 INSERT INTO negotiations 
                 (item_name, original_price, offered_price, strategy_used, outcome, seller_response_time)
                 VALUES (?, ?, ?, ?, ?, ?)
@@ -598,41 +2456,115 @@ class EnhancedVintedAnalyzer:
                 strategy_data.get('seller_response_time', 0)
             ))
             
-            conn.commit()
-            conn.close()
+            # Keep the per-strategy totals in step with the new row
+            conn.execute('''
+                INSERT INTO strategy_stats (strategy_used, total, successes)
+                VALUES (?, 1, ?)
+                ON CONFLICT(strategy_used) DO UPDATE SET
+                    total = total + 1,
+                    successes = successes + excluded.successes
+            ''', (strategy, 1 if outcome == 'accepted' else 0))
+            totals = conn.execute(
+                'SELECT total, successes FROM strategy_stats WHERE strategy_used = ?', (strategy,)
+            ).fetchone()
+            
+            profile = None
+            if seller_id != 'unknown':
+                profile = self._update_seller_stats(conn, seller_id, strategy_data, outcome)
+            return totals, profile
+        
+        def on_commit(result: Tuple[Tuple[int, int], Optional[SellerProfile]]):
+            (total, successes), profile = result
+            if profile is not None:
+                self.seller_profiles_cache.set(profile.seller_id, profile)
             
             # Update strategy success rates
+            self.strategy_success_rates = {
+                **self.strategy_success_rates,
+                strategy: successes / total if total > 0 else 0.5
+            }
+            self.strategy_rates_version += 1
+        
+        self.write_queue.submit(write, on_commit)
+
+    def _update_seller_stats(self, conn: sqlite3.Connection, seller_id: str,
+                             strategy_data: Dict, outcome: str) -> SellerProfile:
+        """Fold one outcome into the seller's response time and flexibility estimates"""
+        row = conn.execute('''
+            SELECT avg_response_time, response_time_var, response_count,
+                   negotiation_flexibility, flexibility_count,
+                   listing_count, account_age_days, feedback_score
+            FROM seller_profiles WHERE seller_id = ?
+        ''', (seller_id,)).fetchone()
+        default = self._default_seller_profile()
+        if row is None:
+            row = (default.avg_response_time, 0.0, 0, default.negotiation_flexibility, 0,
+                   default.listing_count, default.account_age_days, default.feedback_score)
+        (response_time, response_var, response_count, flexibility, flexibility_count,
+         listing_count, account_age_days, feedback_score) = row
+        
+        # Response time in hours; 0 means the client did not say
+        try:
+            hours = float(strategy_data.get('seller_response_time') or 0)
+        except (TypeError, ValueError):
+            hours = 0
+        if outcome != 'no_response' and hours > 0:
+            response_time, response_var, response_count = ewma_update(
+                response_time, response_var or 0.0, response_count or 0, hours)
+        
+        # Flexibility is the discount a seller accepts. A refused or countered
+        # offer only shows it is below the discount asked for.
+        try:
+            discount = 1 - float(strategy_data['offered_price']) / float(strategy_data['original_price'])
+        except (KeyError, TypeError, ValueError, ZeroDivisionError):
+            discount = None
+        if discount is not None and 0 <= discount < 1:
+            if outcome == 'accepted' or (outcome in ('rejected', 'countered') and discount < flexibility):
+                flexibility, _, flexibility_count = ewma_update(
+                    flexibility, 0.0, flexibility_count or 0, discount)
+        
+        conn.execute('''
+            INSERT INTO seller_profiles
+            (seller_id, avg_response_time, response_time_var, response_count,
+             negotiation_flexibility, flexibility_count, listing_count, account_age_days, feedback_score)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(seller_id) DO UPDATE SET
+                avg_response_time = excluded.avg_response_time,
+                response_time_var = excluded.response_time_var,
+                response_count = excluded.response_count,
+                negotiation_flexibility = excluded.negotiation_flexibility,
+                flexibility_count = excluded.flexibility_count,
+                last_updated = CURRENT_TIMESTAMP
+        ''', (seller_id, response_time, response_var, response_count, flexibility, flexibility_count,
+              listing_count, account_age_days, feedback_score))
+        
+        return SellerProfile(seller_id, response_time, flexibility, listing_count, account_age_days, feedback_score)
+
+    def get_strategy_success_rates(self) -> Dict[str, float]:
+        """Return success rates, picking up other workers' updates every STRATEGY_RATES_TTL"""
+        if time.time() - self.strategy_rates_loaded_at >= STRATEGY_RATES_TTL:
             self._update_strategy_success_rates()
-            
-        except Exception as e:
-            logging.error(f"Learning error: {e}")
+        return self.strategy_success_rates
 
     def _update_strategy_success_rates(self):
-        """Update strategy success rates based on historical data"""
+        """Update strategy success rates from the running per-strategy totals"""
         try:
-            conn = sqlite3.connect('vinted_analyzer.db')
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT strategy_used, 
-                       COUNT(*) as total,
-                       SUM(CASE WHEN outcome = 'accepted' THEN 1 ELSE 0 END) as successes
-                FROM negotiations 
-                GROUP BY strategy_used
-            ''')
-            
-            strategy_stats = cursor.fetchall()
+            strategy_stats = self.db.fetchall('SELECT strategy_used, total, successes FROM strategy_stats')
             
             # Store updated success rates
-            self.strategy_success_rates = {}
+            success_rates = {}
             for strategy, total, successes in strategy_stats:
-                self.strategy_success_rates[strategy] = successes / total if total > 0 else 0.5
+                success_rates[strategy] = successes / total if total > 0 else 0.5
             
-            conn.close()
+            if success_rates != self.strategy_success_rates:
+                self.strategy_success_rates = success_rates
+                self.strategy_rates_version += 1
+            self.strategy_rates_loaded_at = time.time()
             
         except Exception as e:
             logging.error(f"Strategy update error: {e}")
 
+    @STAGE_SECONDS.labels(stage='market_analysis').time()
     def analyze_market_position(self, query: str, listed_price: float) -> Dict:
         """Enhanced market analysis with multi-platform data"""
         
@@ -641,33 +2573,21 @@ class EnhancedVintedAnalyzer:
         
         if not market_data_points:
             # Fallback to estimation
-            estimated_price = self._estimate_from_keywords(query)
-            brand_analysis = self._analyze_brand_value(query)
-            return {
-                "sold_median": estimated_price,
-                "sold_mean": estimated_price,
-                "listing_median": estimated_price,
-                "sold_count": 0,
-                "price_variance": 0,
-                "brand_analysis": brand_analysis,
-                "price_vs_sold_ratio": listed_price / estimated_price,
-                "market_position": self._classify_market_position(listed_price / estimated_price),
-                "negotiation_potential": 0.3,
-                "platform_coverage": 1
-            }
+            return self._estimate_market_position(query, listed_price)
         
-        prices = [dp.price for dp in market_data_points]
+        prices = market_data_points.price_series()
         brand_analysis = self._analyze_brand_value(query)
         
         # Enhanced market metrics
+        median = prices.median()
         market_data = {
-            "sold_median": statistics.median(prices),
-            "sold_mean": statistics.mean(prices),
-            "listing_median": statistics.median(prices),  # Simplified
+            "sold_median": median,
+            "sold_mean": prices.mean(),
+            "listing_median": median,  # Simplified
             "sold_count": len(prices),
-            "price_variance": statistics.stdev(prices) if len(prices) > 1 else 0,
+            "price_variance": prices.stdev(),
             "brand_analysis": brand_analysis,
-            "platform_coverage": len(set(dp.platform for dp in market_data_points))
+            "platform_coverage": market_data_points.platform_count()
         }
         
         # Calculate positioning
@@ -681,41 +2601,27 @@ class EnhancedVintedAnalyzer:
         
         return market_data
 
-    def _fetch_sold_prices(self, query: str, limit: int = 30) -> List[float]:
+    def _estimate_market_position(self, query: str, listed_price: float) -> Dict:
+        """Keyword-based market position used when no market data is available"""
+        estimated_price = self._estimate_from_keywords(query)
+        brand_analysis = self._analyze_brand_value(query)
+        return {
+            "sold_median": estimated_price,
+            "sold_mean": estimated_price,
+            "listing_median": estimated_price,
+            "sold_count": 0,
+            "price_variance": 0,
+            "brand_analysis": brand_analysis,
+            "price_vs_sold_ratio": listed_price / estimated_price,
+            "market_position": self._classify_market_position(listed_price / estimated_price),
+            "negotiation_potential": 0.3,
+            "platform_coverage": 1
+        }
+
+    @STAGE_SECONDS.labels(stage='fetch_sold_prices').time()
+    def _fetch_sold_prices(self, query: str, limit: int = 30) -> MarketSeries:
         """Fetch actual sold prices from eBay"""
-        try:
-            url = f"https://www.ebay.co.uk/sch/i.html?_nkw={query.replace(' ', '+')}&_sop=13&LH_Sold=1&LH_Complete=1"
-            headers = {
-                "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 15_0 like Mac OS X) AppleWebKit/605.1.15"
-            }
-            
-            response = requests.get(url, headers=headers, timeout=15)
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            prices = []
-            for item in soup.select(".s-item")[:limit]:
-                try:
-                    if "Shop on eBay" in item.text:
-                        continue
-                        
-                    price_tag = item.select_one(".s-item__price")
-                    if not price_tag:
-                        continue
-                    
-                    price_text = price_tag.text.strip()
-                    price = self._extract_price(price_text)
-                    
-                    if price and 5 <= price <= 2000:
-                        prices.append(price)
-                        
-                except Exception:
-                    continue
-            
-            return prices
-            
-        except Exception as e:
-            logging.error(f"Error fetching sold prices: {e}")
-            return []
+        return self._fetch_sold_listings(query)[:limit]
 
     def _extract_price(self, price_text: str) -> Optional[float]:
         """Extract numeric price from text"""
@@ -732,18 +2638,19 @@ class EnhancedVintedAnalyzer:
 
     def _analyze_brand_value(self, query: str) -> Dict:
         """Analyze brand value and market positioning"""
-        query_lower = query.lower()
-        
-        for brand, data in self.brands_data.items():
-            if brand in query_lower:
-                return {
-                    "brand": brand.title(),
-                    "base_value": data["base"],
-                    "depreciation_rate": data["depreciation"],
-                    "demand_level": data["demand"],
-                    "brand_premium": self._calculate_brand_premium(data["demand"]),
-                    "seasonal_factor": data.get("seasonal_factor", 1.0)
-                }
+        catalog = self.catalog.current
+        brand = catalog.keyword_matcher.match(query).best('brand')
+        
+        if brand:
+            data = catalog.brands_data[brand]
+            return {
+                "brand": brand.title(),
+                "base_value": data["base"],
+                "depreciation_rate": data["depreciation"],
+                "demand_level": data["demand"],
+                "brand_premium": self._calculate_brand_premium(data["demand"]),
+                "seasonal_factor": data.get("seasonal_factor", 1.0)
+            }
         
         return {
             "brand": "Unknown",
@@ -801,29 +2708,21 @@ class EnhancedVintedAnalyzer:
 
     def _estimate_from_keywords(self, query: str) -> float:
         """Estimate price from keywords when no market data available"""
-        query_lower = query.lower()
+        catalog = self.catalog.current
+        matches = catalog.keyword_matcher.match(query)
         
-        brand_value = 30
-        for brand, data in self.brands_data.items():
-            if brand in query_lower:
-                brand_value = data["base"]
-                break
+        brand = matches.best('brand')
+        brand_value = catalog.brands_data[brand]["base"] if brand else 30
         
-        category_value = 40
-        for category, data in self.item_categories.items():
-            if category in query_lower:
-                category_value = data["base"]
-                break
+        category = matches.best('category')
+        category_value = catalog.item_categories[category]["base"] if category else 40
         
         estimated_price = max(brand_value, category_value)
         
         # Condition adjustments
-        if any(word in query_lower for word in ['new', 'unused', 'tags']):
-            estimated_price *= 1.3
-        elif any(word in query_lower for word in ['excellent', 'mint']):
-            estimated_price *= 1.1
-        elif any(word in query_lower for word in ['poor', 'damaged', 'worn']):
-            estimated_price *= 0.7
+        condition_factor = matches.best('condition_price')
+        if condition_factor:
+            estimated_price *= condition_factor
         
         # Apply seasonal factor
         seasonal_factor = self.get_seasonal_factor(query)
@@ -849,14 +2748,250 @@ class EnhancedVintedAnalyzer:
     def generate_enhanced_strategy(self, data: Dict) -> Dict:
         """Enhanced strategy generation with all new features"""
         
-        # Get enhanced market analysis
-        market_analysis = self.analyze_market_position(data["item_name"], data["price"])
+        computed = False
+        
+        def generate() -> Dict:
+            nonlocal computed
+            computed = True
+            
+            # Get enhanced market analysis
+            market_analysis = self.analyze_market_position(data["item_name"], data["price"])
+            
+            # Get market trends
+            market_trends = self.analyze_market_trends(data["item_name"])
+            
+            # Analyze seller profile
+            seller_profile = self.analyze_seller_profile(data.get('seller_data', {}))
+            
+            return self._build_strategy(data, market_analysis, market_trends, seller_profile)
+        
+        key = self._strategy_cache_key(data)
+        result = self.strategy_cache.get_or_compute(key, generate)
+        if computed:
+            # A cold fetch records the version of the data it loaded, so file
+            # the result under that rather than the version seen beforehand
+            settled_key = self._strategy_cache_key(data)
+            if settled_key != key:
+                self.strategy_cache.invalidate(key)
+                self.strategy_cache.set(settled_key, result)
+            return dict(result)
+        
+        # A memoized answer still counts towards the query's popularity
+        self.refresher.record_request(self._normalize_query(data["item_name"]))
+        return self._memoized_strategy(data, result)
+
+    def _strategy_cache_key(self, data: Dict) -> Tuple:
+        """Memo key: the normalized inputs a strategy depends on, plus versions of the data behind it.
+
+        Reading the rates first picks up outcomes other workers recorded since
+        the last STRATEGY_RATES_TTL refresh. The seller's cached profile is part
+        of the key, so a profile reloaded after another worker learned from an
+        outcome (within SELLER_PROFILE_TTL) misses the old entries.
+        """
+        self.get_strategy_success_rates()
+        query = self._normalize_query(data["item_name"])
+        seller_id = (data.get('seller_data') or {}).get('seller_id') or 'unknown'
+        profile = self.seller_profiles_cache.peek(seller_id)
+        now = datetime.now()
+        return (
+            # Numbers as the strategy compares them, so 2 and 2.0 share an entry but 2 and 2.9 do not
+            query, float(data["price"]), float(data["days"]), float(data["interested"]), float(data.get("views") or 0),
+            json.dumps(data.get('seller_data', {}), sort_keys=True),
+            tuple(profile.__dict__.values()) if isinstance(profile, SellerProfile) else None,
+            self.market_data_version(query),
+            self.strategy_rates_version,
+            self.catalog.reloads,
+            # Seasonal factors change by month, contact timing by weekday, hour and end of month
+            (now.month, now.weekday(), now.hour, now.day > 25)
+        )
+
+    def _memoized_strategy(self, data: Dict, result: Dict) -> Dict:
+        """A copy of a memoized strategy with its message written for this request.
+
+        Requests sharing a memo entry may spell the item or the days differently,
+        and the message (template choice included) depends on both.
+        """
+        message = self._generate_enhanced_contextual_message(
+            {'name': result['method']}, data, result['offer_price'], result['market_analysis'],
+            result['seller_motivation'], result['market_trends'], result['timing_analysis']
+        )
+        return {**result, 'message': message}
+
+    def generate_enhanced_strategy_concurrent(self, data: Dict, timeouts: Optional[Dict] = None) -> Dict:
+        """Strategy generation with the independent stages run concurrently"""
+        timeouts = {**STAGE_TIMEOUTS, **(timeouts or {})}
+        
+        cached = self.strategy_cache.get(self._strategy_cache_key(data))
+        if cached is not None:
+            self.refresher.record_request(self._normalize_query(data["item_name"]))
+            return {**self._memoized_strategy(data, cached), 'degraded_stages': []}
+        
+        results = {}
+        degraded_stages = []
+        for name, result, degraded in self._run_stages(self._analysis_stages(data), timeouts):
+            results[name] = result
+            if degraded:
+                degraded_stages.append(name)
+        
+        return self._finish_strategy(data, results, degraded_stages)
+
+    def generate_enhanced_strategy_progressive(self, data: Dict,
+                                               timeouts: Optional[Dict] = None) -> Iterator[Tuple[str, Any]]:
+        """Strategy generation yielding (stage, result) as each part becomes available.
+
+        'preliminary' comes first with the keyword price estimate, seller
+        motivation, seller profile and contact timing, then 'market_analysis'
+        and 'market_trends' in the order they finish, then 'strategy'.
+        """
+        timeouts = {**STAGE_TIMEOUTS, **(timeouts or {})}
+        item_name = data["item_name"]
+        seller_motivation = self._analyze_seller_motivation(data["days"], data["interested"], data.get("views", 0))
+        
+        def preliminary(seller_profile: SellerProfile) -> Dict:
+            return {
+                'estimated_price': self._estimate_from_keywords(item_name),
+                'seller_motivation': seller_motivation,
+                'seller_profile': seller_profile,
+                'timing_analysis': self.calculate_optimal_timing(seller_profile)
+            }
+        
+        cached = self.strategy_cache.get(self._strategy_cache_key(data))
+        if cached is not None:
+            self.refresher.record_request(self._normalize_query(item_name))
+            cached = self._memoized_strategy(data, cached)
+            yield 'preliminary', preliminary(SellerProfile(**cached['seller_profile']))
+            yield 'market_analysis', cached['market_analysis']
+            yield 'market_trends', cached['market_trends']
+            yield 'strategy', {**cached, 'degraded_stages': []}
+            return
+        
+        results = {}
+        degraded_stages = []
+        # Timing needs the seller profile, so market stages that beat it wait their turn
+        held = []
+        for name, result, degraded in self._run_stages(self._analysis_stages(data), timeouts):
+            results[name] = result
+            if degraded:
+                degraded_stages.append(name)
+            if name == 'seller_profile':
+                yield 'preliminary', preliminary(result)
+                yield from held
+                held = None
+            elif held is None:
+                yield name, result
+            else:
+                held.append((name, result))
+        
+        yield 'strategy', self._finish_strategy(data, results, degraded_stages)
+
+    def _analysis_stages(self, data: Dict) -> Dict[str, Tuple[Callable[[], Any], Callable[[], Any]]]:
+        """The independent analysis stages for a listing, as (run, fallback) pairs"""
+        item_name = data["item_name"]
+        return {
+            'market_analysis': (
+                lambda: self.analyze_market_position(item_name, data["price"]),
+                lambda: self._estimate_market_position(item_name, data["price"])
+            ),
+            'market_trends': (
+                lambda: self.analyze_market_trends(item_name),
+                lambda: self._default_market_trends(item_name)
+            ),
+            'seller_profile': (
+                lambda: self.analyze_seller_profile(data.get('seller_data', {})),
+                self._default_seller_profile
+            )
+        }
+
+    def _run_stages(self, stages: Dict[str, Tuple[Callable[[], Any], Callable[[], Any]]],
+                    timeouts: Dict[str, float]) -> Iterator[Tuple[str, Any, bool]]:
+        """Run stages on the executor, yielding (name, result, degraded) as each one settles.
+
+        A stage that fails or misses its deadline yields its fallback instead.
+        """
+        started = time.monotonic()
+        pending = {self.executor.submit(run): name for name, (run, _) in stages.items()}
+        
+        while pending:
+            # Stages share a start time, so each deadline is measured from it
+            deadline = min(started + timeouts[name] for name in pending.values())
+            done, _ = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+            
+            settled = []
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    settled.append((name, future.result(), False))
+                except Exception as e:
+                    logging.error(f"Analysis stage {name} failed: {e}")
+                    settled.append((name, stages[name][1](), True))
+            
+            now = time.monotonic()
+            for future, name in list(pending.items()):
+                # A stage that finished since wait() returned is collected next round
+                if not future.done() and now >= started + timeouts[name]:
+                    del pending[future]
+                    logging.warning(f"Analysis stage {name} timed out after {timeouts[name]}s")
+                    settled.append((name, stages[name][1](), True))
+            
+            yield from settled
+
+    def _finish_strategy(self, data: Dict, results: Dict, degraded_stages: List[str]) -> Dict:
+        """Build the strategy from settled stage results, memoizing it unless a stage degraded"""
+        result = self._build_strategy(
+            data, results['market_analysis'], results['market_trends'], results['seller_profile']
+        )
+        # Fallback results are not worth repeating once the slow stage recovers. The key is
+        # built now the stages have settled, so it carries the version of the data they used
+        if not degraded_stages:
+            self.strategy_cache.set(self._strategy_cache_key(data), result)
+        return {**result, 'degraded_stages': degraded_stages}
+
+    def analyze_batch(self, listings: List[Dict]) -> Iterator[Tuple[int, Optional[Dict], Optional[Exception]]]:
+        """Analyze many listings, yielding (index, result, error) as each one finishes"""
+        # Listings that share a market query share one fetch
+        groups = {}
+        for index, listing in enumerate(listings):
+            groups.setdefault(self._normalize_query(listing["item_name"]), []).append(index)
         
-        # Get market trends
-        market_trends = self.analyze_market_trends(data["item_name"])
+        results = queue.Queue()
         
-        # Analyze seller profile
-        seller_profile = self.analyze_seller_profile(data.get('seller_data', {}))
+        def run_group(query: str, indexes: List[int]):
+            reported = 0
+            try:
+                # Warm the shared caches once, then score each listing against them
+                self._fetch_sold_listings(query)
+                for index in indexes:
+                    try:
+                        results.put((index, self.generate_enhanced_strategy(listings[index]), None))
+                    except Exception as e:
+                        results.put((index, None, e))
+                    reported += 1
+            except Exception as e:
+                # Every listing in the group must be answered or the caller waits forever
+                for index in indexes[reported:]:
+                    results.put((index, None, e))
+        
+        for query, indexes in groups.items():
+            self.batch_executor.submit(run_group, query, indexes)
+        
+        deadline = time.monotonic() + BATCH_TIMEOUT
+        pending = set(range(len(listings)))
+        while pending:
+            try:
+                index, result, error = results.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                error = TimeoutError(f'Batch analysis timed out after {BATCH_TIMEOUT}s')
+                for index in sorted(pending):
+                    yield index, None, error
+                return
+            pending.discard(index)
+            yield index, result, error
+
+    @STAGE_SECONDS.labels(stage='build_strategy').time()
+    def _build_strategy(self, data: Dict, market_analysis: Dict, market_trends: Dict,
+                        seller_profile: SellerProfile) -> Dict:
+        """Combine market, trend and seller analysis into a negotiation strategy"""
         
         # Calculate seller motivation
         seller_motivation = self._analyze_seller_motivation(
@@ -1177,10 +3312,190 @@ class EnhancedVintedAnalyzer:
 # Initialize enhanced analyzer
 analyzer = EnhancedVintedAnalyzer()
 
+_background_lock = threading.Lock()
+_background_pid = None
+
+@app.before_request
+def start_background_tasks():
+    """Start the refresher and catalog reloader once per process, after any fork"""
+    global _background_pid
+    if _background_pid == os.getpid():
+        return
+
+    with _background_lock:
+        if _background_pid == os.getpid():
+            return
+        if MARKET_REFRESHER_ENABLED:
+            analyzer.refresher.start()
+        if CATALOG_RELOAD_ENABLED:
+            analyzer.catalog.start()
+        _background_pid = os.getpid()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create or upgrade the database schema, once per deployment"""
+    version = analyzer.db.migrate()
+    click.echo(f"Database schema at version {version}")
+
+def _collect_analyzer_metrics() -> List[Tuple[str, str, str, List[Tuple[Dict, float]]]]:
+    """Cache, upstream and queue state read when /metrics is scraped"""
+    caches = {
+        'market_trends': analyzer.market_trends_cache.stats(),
+        'sold_listings': analyzer.sold_listings_cache.stats(),
+        'seller_profiles': analyzer.seller_profiles_cache.stats(),
+        'strategies': analyzer.strategy_cache.stats(),
+        'brand_suggestions': analyzer.catalog.current.brand_index.cache.stats()
+    }
+    http_stats = analyzer.http.stats()
+    flight = analyzer.sold_listings_flight
+    return [
+        ('vinted_cache_hits_total', 'counter', 'Cache lookups that found a live entry',
+         [({'cache': name}, stats['hits']) for name, stats in caches.items()]),
+        ('vinted_cache_misses_total', 'counter', 'Cache lookups that found nothing usable',
+         [({'cache': name}, stats['misses']) for name, stats in caches.items()]),
+        ('vinted_cache_evictions_total', 'counter', 'Entries evicted to stay within the size limit',
+         [({'cache': name}, stats['evictions']) for name, stats in caches.items()]),
+        ('vinted_cache_hit_ratio', 'gauge', 'Share of cache lookups that hit',
+         [({'cache': name}, stats['hit_ratio']) for name, stats in caches.items()]),
+        ('vinted_cache_entries', 'gauge', 'Entries currently cached',
+         [({'cache': name}, stats['size']) for name, stats in caches.items()]),
+        ('vinted_upstream_requests_total', 'counter', 'HTTP requests sent to upstream sites',
+         [({}, http_stats['requests'])]),
+        ('vinted_upstream_retries_total', 'counter', 'Upstream requests retried after 429, 5xx or connection errors',
+         [({}, http_stats['retries'])]),
+        ('vinted_upstream_failures_total', 'counter', 'Upstream requests that failed after all retries',
+         [({}, http_stats['failures'])]),
+        ('vinted_upstream_connections_reused_total', 'counter', 'Upstream requests served on a pooled connection',
+         [({}, http_stats['connections_reused'])]),
+        ('vinted_scrapes_coalesced_total', 'counter', 'Scrapes shared with a concurrent identical lookup',
+         [({}, flight.shared)]),
+        ('vinted_write_queue_depth', 'gauge', 'Learning outcomes waiting to be written',
+         [({}, analyzer.write_queue.depth())]),
+        ('vinted_catalog_reloads_total', 'counter', 'Catalog snapshots loaded from the catalog file',
+         [({}, analyzer.catalog.reloads)])
+    ]
+
+metrics.register_collector(_collect_analyzer_metrics)
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _observe_request_time(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.endpoint or 'unknown'
+        
+        def observe():
+            REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+        
+        # A streamed body is generated after this hook returns, so time it until the response closes
+        if response.is_streamed:
+            response.call_on_close(observe)
+        else:
+            observe()
+    return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+ANALYZE_REQUIRED_FIELDS = ['item_name', 'price', 'days', 'interested']
+
+def _missing_field(data: Dict, required_fields: List[str]) -> Optional[str]:
+    """Return the first required field absent from a request payload"""
+    for field in required_fields:
+        if field not in data:
+            return field
+    return None
+
+def _market_insight(market_analysis: Dict) -> str:
+    return f"This item is {market_analysis['market_position'].replace('_', ' ')} compared to similar listings."
+
+def _seller_insight(seller_motivation: Dict) -> str:
+    return f"Seller appears to be a {seller_motivation['seller_type'].replace('_', ' ')} based on listing behavior."
+
+def _trend_insight(market_trends: Dict) -> str:
+    return f"Market trend: {market_trends['price_trend']} (seasonal factor: {market_trends['seasonal_factor']:.2f})"
+
+def _timing_insight(timing_analysis: Dict) -> str:
+    return f"Current timing score: {timing_analysis['timing_score']:.2f}/1.0"
+
+def _format_analysis_response(data: Dict, result: Dict) -> Dict:
+    """Shape a generated strategy into the /analyze response body"""
+    return {
+        'success': True,
+        'strategy': {
+            'method': result['method'],
+            'offer_price': result['offer_price'],
+            'confidence': result['confidence'],
+            'discount_percent': result['discount_percent'],
+            'message': result['message']
+        },
+        'analysis': {
+            'market_position': result['reasoning']['market_position'],
+            'negotiation_strength': result['reasoning']['negotiation_strength'],
+            'seller_motivation': result['seller_motivation']['seller_type'],
+            'strategy_rationale': result['reasoning']['strategy_rationale'],
+            'brand_info': result['market_analysis']['brand_analysis'],
+            'trend_impact': result['reasoning']['trend_impact'],
+            'seasonal_factor': result['reasoning']['seasonal_factor']
+        },
+        'market_price': result['market_analysis'].get('sold_median', data['price'] * 0.8),
+        'insights': {
+            'market_comparison': _market_insight(result['market_analysis']),
+            'seller_insights': _seller_insight(result['seller_motivation']),
+            'trend_insights': _trend_insight(result['market_trends']),
+            'timing_insights': _timing_insight(result['timing_analysis'])
+        },
+        'enhanced_features': {
+            'market_trends': result['market_trends'],
+            'seller_profile': result['seller_profile'],
+            'timing_analysis': result['timing_analysis']
+        },
+        'degraded_stages': result.get('degraded_stages', [])
+    }
+
+def _format_analysis_stage(data: Dict, stage: str, result: Any) -> Dict:
+    """Shape one stage of a progressive analysis into an /api/analyze-stream line"""
+    if stage == 'preliminary':
+        return {
+            'stage': stage,
+            'estimated_price': round(result['estimated_price'], 2),
+            'analysis': {'seller_motivation': result['seller_motivation']['seller_type']},
+            'insights': {
+                'seller_insights': _seller_insight(result['seller_motivation']),
+                'timing_insights': _timing_insight(result['timing_analysis'])
+            },
+            'enhanced_features': {
+                'seller_profile': result['seller_profile'].__dict__,
+                'timing_analysis': result['timing_analysis']
+            }
+        }
+    if stage == 'market_analysis':
+        return {
+            'stage': stage,
+            'market_price': result.get('sold_median', data['price'] * 0.8),
+            'analysis': {
+                'market_position': result['market_position'],
+                'brand_info': result['brand_analysis']
+            },
+            'insights': {'market_comparison': _market_insight(result)}
+        }
+    if stage == 'market_trends':
+        return {
+            'stage': stage,
+            'market_trends': result,
+            'insights': {'trend_insights': _trend_insight(result)}
+        }
+    return {'stage': stage, **_format_analysis_response(data, result)}
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
     try:
@@ -1189,57 +3504,100 @@ def analyze():
         if not data:
             return jsonify({'success': False, 'error': 'No data provided'}), 400
         
-        required_fields = ['item_name', 'price', 'days', 'interested']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'success': False, 'error': f'Missing field: {field}'}), 400
+        missing = _missing_field(data, ANALYZE_REQUIRED_FIELDS)
+        if missing:
+            return jsonify({'success': False, 'error': f'Missing field: {missing}'}), 400
         
         # Generate enhanced analysis
-        result = analyzer.generate_enhanced_strategy(data)
-        
-        response = {
-            'success': True,
-            'strategy': {
-                'method': result['method'],
-                'offer_price': result['offer_price'],
-                'confidence': result['confidence'],
-                'discount_percent': result['discount_percent'],
-                'message': result['message']
-            },
-            'analysis': {
-                'market_position': result['reasoning']['market_position'],
-                'negotiation_strength': result['reasoning']['negotiation_strength'],
-                'seller_motivation': result['seller_motivation']['seller_type'],
-                'strategy_rationale': result['reasoning']['strategy_rationale'],
-                'brand_info': result['market_analysis']['brand_analysis'],
-                'trend_impact': result['reasoning']['trend_impact'],
-                'seasonal_factor': result['reasoning']['seasonal_factor']
-            },
-            'market_price': result['market_analysis'].get('sold_median', data['price'] * 0.8),
-            'insights': {
-                'market_comparison': f"This item is {result['reasoning']['market_position'].replace('_', ' ')} compared to similar listings.",
-                'seller_insights': f"Seller appears to be a {result['seller_motivation']['seller_type'].replace('_', ' ')} based on listing behavior.",
-                'trend_insights': f"Market trend: {result['market_trends']['price_trend']} (seasonal factor: {result['market_trends']['seasonal_factor']:.2f})",
-                'timing_insights': f"Current timing score: {result['timing_analysis']['timing_score']:.2f}/1.0"
-            },
-            'enhanced_features': {
-                'market_trends': result['market_trends'],
-                'seller_profile': result['seller_profile'],
-                'timing_analysis': result['timing_analysis']
-            }
-        }
+        result = analyzer.generate_enhanced_strategy_concurrent(data)
         
-        return jsonify(response)
+        return jsonify(_format_analysis_response(data, result))
         
     except Exception as e:
         logging.error(f"Enhanced analysis error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/analyze-stream', methods=['POST'])
+def analyze_stream():
+    """Analyze one listing, streaming an NDJSON line per stage as it completes"""
+    data = request.get_json(silent=True)
+    
+    if not data:
+        return jsonify({'success': False, 'error': 'No data provided'}), 400
+    
+    missing = _missing_field(data, ANALYZE_REQUIRED_FIELDS)
+    if missing:
+        return jsonify({'success': False, 'error': f'Missing field: {missing}'}), 400
+    
+    def generate():
+        try:
+            for stage, result in analyzer.generate_enhanced_strategy_progressive(data):
+                yield json.dumps(_format_analysis_stage(data, stage, result)) + '\n'
+        except Exception as e:
+            logging.error(f"Streaming analysis error: {str(e)}")
+            yield json.dumps({'stage': 'error', 'success': False, 'error': str(e)}) + '\n'
+    
+    # Proxies that buffer responses would hold the early stages back until the end
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/analyze-batch', methods=['POST'])
+def analyze_batch():
+    """Score many listings in one call, streaming one NDJSON line per listing"""
+    data = request.get_json(silent=True)
+    listings = data.get('listings') if isinstance(data, dict) else None
+    
+    if not isinstance(listings, list) or not listings:
+        return jsonify({'success': False, 'error': 'No listings provided'}), 400
+    if len(listings) > BATCH_MAX_LISTINGS:
+        return jsonify({'success': False, 'error': f'Too many listings (max {BATCH_MAX_LISTINGS})'}), 400
+    
+    # Reject invalid listings up front so only valid ones reach the analyzer
+    errors = []
+    valid = []
+    for index, listing in enumerate(listings):
+        if not isinstance(listing, dict):
+            errors.append({'index': index, 'success': False, 'error': 'Listing must be an object'})
+            continue
+        missing = _missing_field(listing, ANALYZE_REQUIRED_FIELDS)
+        if missing:
+            errors.append({'index': index, 'success': False, 'error': f'Missing field: {missing}'})
+        elif not isinstance(listing['item_name'], str):
+            errors.append({'index': index, 'success': False, 'error': 'item_name must be a string'})
+        else:
+            valid.append(index)
+    
+    def generate():
+        for line in errors:
+            yield json.dumps(line) + '\n'
+        
+        for position, result, error in analyzer.analyze_batch([listings[i] for i in valid]):
+            index = valid[position]
+            if error is not None:
+                logging.error(f"Batch analysis error: {error}")
+                line = {'index': index, 'success': False, 'error': str(error)}
+            else:
+                line = {'index': index, **_format_analysis_response(listings[index], result)}
+            yield json.dumps(line) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def _cacheable_json(payload: Any, max_age: int, stale_while_revalidate: int) -> Response:
+    """JSON response with an ETag and Cache-Control; a matching If-None-Match gets a 304"""
+    response = jsonify(payload)
+    # Hashing the body built from the cached entry gives every worker the same
+    # ETag for the same data, which a per-process version counter would not
+    response.add_etag()
+    response.headers['Cache-Control'] = (
+        f'public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}'
+    )
+    return response.make_conditional(request)
+
 @app.route('/api/brands')
 def get_brand_suggestions():
     query = request.args.get('q', '')
     suggestions = analyzer.get_brand_suggestions(query)
-    return jsonify(suggestions)
+    return _cacheable_json(suggestions, BRANDS_MAX_AGE, BRANDS_STALE_WHILE_REVALIDATE)
 
 @app.route('/api/analyze-text', methods=['POST'])
 def analyze_text():
@@ -1280,17 +3638,69 @@ def learn_from_outcome():
         logging.error(f"Learning error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/learn/stats')
+def learn_stats():
+    """Write-behind queue depth and throughput, and success rates, for learning outcomes"""
+    return jsonify({'success': True, 'write_queue': analyzer.write_queue.stats(),
+                    'strategy_success_rates': analyzer.get_strategy_success_rates()})
+
 @app.route('/api/market-trends/<path:item_name>')
 def get_market_trends(item_name):
     """New endpoint for real-time market trends"""
     try:
         trends = analyzer.analyze_market_trends(item_name)
-        return jsonify({
+        payload = {
             'success': True,
             'trends': trends
-        })
+        }
+        # A single data source means keyword defaults stood in for missing or failed
+        # market data; browsers should ask again rather than keep them
+        if trends['data_sources'] < 2:
+            return jsonify(payload), 200, {'Cache-Control': 'no-store'}
+        return _cacheable_json(payload, MARKET_TRENDS_MAX_AGE, MARKET_TRENDS_STALE_WHILE_REVALIDATE)
     except Exception as e:
         logging.error(f"Market trends error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500, {'Cache-Control': 'no-store'}
+
+@app.route('/api/watchlist', methods=['GET'])
+def get_watchlist():
+    """List watched market queries and how fresh their data is"""
+    try:
+        return jsonify({'success': True, 'watchlist': analyzer.refresher.list()})
+    except Exception as e:
+        logging.error(f"Watchlist error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/watchlist', methods=['POST'])
+def watch_market():
+    """Keep market data for an item warm in the background"""
+    try:
+        data = request.get_json(silent=True) or {}
+        item_name = data.get('item_name', '')
+        
+        if not item_name.strip():
+            return jsonify({'success': False, 'error': 'Missing field: item_name'}), 400
+        
+        watched = analyzer.refresher.watch(analyzer._normalize_query(item_name))
+        if watched is None:
+            return jsonify({'success': False, 'error': f'Watchlist is full (max {WATCHLIST_MAX_QUERIES})'}), 409
+        return jsonify({'success': True, 'watched': watched})
+        
+    except Exception as e:
+        logging.error(f"Watchlist error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/watchlist/<path:item_name>', methods=['DELETE'])
+def unwatch_market(item_name):
+    """Stop watching an item"""
+    try:
+        removed = analyzer.refresher.unwatch(analyzer._normalize_query(item_name))
+        if not removed:
+            return jsonify({'success': False, 'error': 'Not watched'}), 404
+        return jsonify({'success': True})
+        
+    except Exception as e:
+        logging.error(f"Watchlist error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 if __name__ == '__main__':
@@ -0,0 +1,122 @@
+"""CPU cost of extracting sold listings from recorded eBay pages.
+
+Compares the original full BeautifulSoup parse, a SoupStrainer-limited
+BeautifulSoup parse and the streaming ``SoldListingsParser`` used by the
+app, checks that all three extract the same data points, and reports CPU
+milliseconds per page.
+
+    python benchmarks/bench_parse.py [--repeat 20] [--json results.json]
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup, SoupStrainer  # noqa: E402
+
+import app  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def _to_points(cards):
+    """Apply the app's price and date rules to (text, price, ended) tuples"""
+    points = []
+    for card_text, price_text, date_text in cards:
+        if "Shop on eBay" in card_text or price_text is None:
+            continue
+        price = app.analyzer._extract_price(price_text.strip())
+        if not price or price < 5 or price > 2000:
+            continue
+        days_ago = 0
+        if date_text is not None and 'day' in date_text:
+            match = re.search(r'(\d+)', date_text)
+            if match:
+                days_ago = int(match.group(1))
+        points.append((price, days_ago))
+    return points
+
+
+def _soup_cards(soup, limit):
+    cards = []
+    for item in soup.select(".s-item")[:limit]:
+        price_tag = item.select_one(".s-item__price")
+        date_tag = item.select_one(".s-item__endedDate")
+        cards.append((item.text, price_tag.text if price_tag else None, date_tag.text if date_tag else None))
+    return cards
+
+
+def parse_full_soup(html, limit):
+    """The original implementation: build a tree of the whole page"""
+    return _to_points(_soup_cards(BeautifulSoup(html, "html.parser"), limit))
+
+
+def parse_strained_soup(html, limit):
+    """BeautifulSoup restricted to result cards"""
+    # A plain class_="s-item" strainer misses multi-class cards at parse time
+    strainer = SoupStrainer(class_=lambda value: value is not None and 's-item' in value.split())
+    return _to_points(_soup_cards(BeautifulSoup(html, "html.parser", parse_only=strainer), limit))
+
+
+def parse_streaming(html, limit):
+    """The app's streaming extractor"""
+    return [(p.price, p.days_ago) for p in app.analyzer._parse_sold_listings(html, limit)]
+
+
+PARSERS = {
+    'bs4_full': parse_full_soup,
+    'bs4_strainer': parse_strained_soup,
+    'streaming': parse_streaming,
+}
+
+
+def bench(html, parser, limit, repeat):
+    """Best-of-repeat CPU milliseconds for one parse"""
+    timings = []
+    for _ in range(repeat):
+        start = time.process_time()
+        parser(html, limit)
+        timings.append((time.process_time() - start) * 1000)
+    return min(timings), sum(timings) / len(timings)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--repeat', type=int, default=20)
+    arg_parser.add_argument('--limit', type=int, default=app.SOLD_LISTINGS_LIMIT)
+    arg_parser.add_argument('--json', help='write results to this file')
+    args = arg_parser.parse_args()
+
+    results = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html'))):
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        name = os.path.basename(path)
+
+        expected = parse_full_soup(html, args.limit)
+        results[name] = {'bytes': len(html), 'points': len(expected)}
+        for parser_name, parser in PARSERS.items():
+            if parser(html, args.limit) != expected:
+                raise SystemExit(f"{parser_name} disagrees with bs4_full on {name}")
+            best, mean = bench(html, parser, args.limit, args.repeat)
+            results[name][parser_name] = {'best_ms': round(best, 3), 'mean_ms': round(mean, 3)}
+
+        baseline = results[name]['bs4_full']['mean_ms']
+        print(f"{name} ({len(html) // 1024} KB, {len(expected)} points)")
+        for parser_name in PARSERS:
+            timing = results[name][parser_name]
+            print(f"  {parser_name:<14} best {timing['best_ms']:8.2f} ms  "
+                  f"mean {timing['mean_ms']:8.2f} ms  x{baseline / timing['mean_ms']:.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Cold start cost of the app, measured in fresh interpreter processes.
+
+For each case a new Python process imports ``app`` (the "ready" time) and
+serves its first and second request through the Flask test client.
+``preload`` imports and warms the app once, then forks workers the way
+``gunicorn.conf.py`` does and times the slowest worker's first request. ``--catalog-size`` pads the catalog
+with synthetic brands to show where catalog indexing cost lands.
+
+    python benchmarks/bench_startup.py [--repeat 5] [--workers 4] [--catalog-size 5000]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON object of timings in ms
+SINGLE = '''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, ROOT)
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+client.get('/api/brands?q=ni')
+first = time.perf_counter()
+client.get('/api/brands?q=ad')
+second = time.perf_counter()
+print(json.dumps({'ready': (imported - start) * 1000, 'first_request': (first - imported) * 1000,
+                  'second_request': (second - first) * 1000}))
+'''
+
+PRELOAD = '''
+import json, os, sys, time
+start = time.perf_counter()
+sys.path.insert(0, ROOT)
+import app
+app.analyzer.warm()
+ready = time.perf_counter()
+pipes = []
+for _ in range(WORKERS):
+    read_fd, write_fd = os.pipe()
+    if os.fork() == 0:
+        os.close(read_fd)
+        began = time.perf_counter()
+        app.app.test_client().get('/api/brands?q=ni')
+        os.write(write_fd, str((time.perf_counter() - began) * 1000).encode())
+        os._exit(0)
+    os.close(write_fd)
+    pipes.append(read_fd)
+firsts = []
+for read_fd in pipes:
+    firsts.append(float(os.read(read_fd, 64)))
+    os.wait()
+print(json.dumps({'ready': (ready - start) * 1000, 'first_request': max(firsts),
+                  'second_request': 0.0}))
+'''
+
+
+def write_catalog(path, extra_brands, seed=1):
+    with open(os.path.join(ROOT, 'data', 'catalog.json')) as f:
+        catalog = json.load(f)
+    rng = random.Random(seed)
+    for _ in range(extra_brands):
+        name = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+        catalog['brands'][name] = {"base": rng.randint(20, 200), "depreciation": 0.15,
+                                   "demand": "medium", "seasonal_factor": 1.0}
+        catalog['autocomplete'].append({"name": name.title(), "popularity": rng.random(),
+                                        "aliases": [name[::-1]]})
+    with open(path, 'w') as f:
+        json.dump(catalog, f)
+
+
+def run_case(code, env, repeat):
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True,
+                                text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--catalog-size', type=int, default=0,
+                        help='synthetic brands added to the catalog')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='vinted-startup-')
+    try:
+        db_path = os.path.join(workdir, 'startup.db')
+        catalog_path = os.path.join(ROOT, 'data', 'catalog.json')
+        if args.catalog_size:
+            catalog_path = os.path.join(workdir, 'catalog.json')
+            write_catalog(catalog_path, args.catalog_size)
+
+        env = dict(os.environ, VINTED_DB_PATH=db_path, VINTED_CATALOG_PATH=catalog_path,
+                   MARKET_REFRESHER='0', CATALOG_RELOAD='0')
+        single = SINGLE.replace('ROOT', repr(ROOT))
+        preload = PRELOAD.replace('ROOT', repr(ROOT)).replace('WORKERS', str(args.workers))
+
+        def fresh_db():
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+
+        cases = []
+        fresh_runs = []
+        for _ in range(args.repeat):
+            fresh_db()
+            fresh_runs.append(run_case(single, env, 1))
+        cases.append(('fresh database', {key: statistics.median(run[key] for run in fresh_runs)
+                                         for key in fresh_runs[0]}))
+        cases.append(('migrated database', run_case(single, env, args.repeat)))
+        cases.append((f'preload, {args.workers} workers', run_case(preload, env, args.repeat)))
+
+        print(f"catalog: {catalog_path} ({args.catalog_size} synthetic brands), median of {args.repeat} runs")
+        for name, timings in cases:
+            print(f"{name:<22} ready {timings['ready']:8.1f} ms  first request {timings['first_request']:8.1f} ms  "
+                  f"second request {timings['second_request']:6.1f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
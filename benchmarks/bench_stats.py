@@ -0,0 +1,89 @@
+"""Market statistics cost as the number of historical price points grows.
+
+Compares the original list-of-dataclasses path (``statistics`` module and
+list comprehensions, as ``analyze_market_position`` and
+``analyze_market_trends`` used to do it) with ``PriceSeries``, and the memory
+held per cached query by a list of points against a ``MarketSeries``.
+
+    python benchmarks/bench_stats.py [--sizes 50,1000,10000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import MarketDataPoint, MarketSeries, PriceSeries  # noqa: E402
+
+
+def legacy(points):
+    prices = [dp.price for dp in points]
+    recent = statistics.mean([p.price for p in points[:10]])
+    older = statistics.mean([p.price for p in points[-10:]])
+    surge = len([p for p in points if p.days_ago <= 7])
+    return (statistics.median(prices), statistics.mean(prices),
+            statistics.stdev(prices) if len(prices) > 1 else 0, recent, older, surge)
+
+
+def columnar(points):
+    series = PriceSeries.from_points(points)
+    return (series.median(), series.mean(), series.stdev(),
+            series.head(10).mean(), series.tail(10).mean(), series.count_within(7))
+
+
+def columnar_summary(points):
+    series = PriceSeries.from_points(points)
+    return series.summary(), series.head(10).mean(), series.tail(10).mean(), series.count_within(7)
+
+
+def allocated(build):
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del value
+    return size
+
+
+def bench(fn, points, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(points)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='50,1000,10000')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    for size in [int(s) for s in args.sizes.split(',')]:
+        points = [MarketDataPoint(price=rng.uniform(5, 500), platform='ebay', condition='unknown',
+                                  days_ago=rng.randint(0, 90)) for _ in range(size)]
+        old, new = legacy(points), columnar(points)
+        if any(abs(a - b) > 1e-6 * max(1.0, abs(a)) for a, b in zip(old, new)):
+            raise SystemExit(f"PriceSeries disagrees with statistics at n={size}")
+
+        legacy_ms = bench(legacy, points, args.repeat)
+        columnar_ms = bench(columnar, points, args.repeat)
+        summary_ms = bench(columnar_summary, points, args.repeat)
+        print(f"n={size:<6} statistics {legacy_ms:8.3f} ms  PriceSeries {columnar_ms:8.3f} ms "
+              f"(x{legacy_ms / columnar_ms:.1f})  full summary {summary_ms:8.3f} ms")
+
+        rows = [(p.price, p.platform, p.condition, p.days_ago) for p in points]
+        list_bytes = allocated(lambda: [MarketDataPoint(*row) for row in rows])
+        series_bytes = allocated(lambda: MarketSeries.from_points(MarketDataPoint(*row) for row in rows))
+        print(f"{'':8}memory: points {list_bytes / size:6.1f} B/point  "
+              f"MarketSeries {series_bytes / size:6.1f} B/point")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,299 @@
+"""Offline load benchmark for the analysis hot path.
+
+Serves the recorded pages in ``benchmarks/fixtures`` from a local stand-in
+for eBay (with configurable latency and error rate), points the app at it
+through ``EBAY_BASE_URL``, and drives ``/analyze``, ``/api/market-trends/``
+and ``generate_enhanced_strategy`` at each concurrency level. Every level
+starts from cold caches and a fresh database.
+
+Reports throughput, p50/p95/p99 latency, upstream requests and Python
+allocations, and writes everything to JSON so two runs can be compared:
+
+    python benchmarks/harness.py --concurrency 1,8,32 --output before.json
+    python benchmarks/harness.py --concurrency 1,8,32 --output after.json --compare before.json
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+QUERIES = [
+    "nike air max", "adidas samba", "north face jacket", "carhartt jacket", "ralph lauren shirt",
+    "levis jeans", "patagonia fleece", "stone island jumper", "dr martens boots", "gucci bag",
+    "new balance 550", "barbour jacket", "supreme hoodie", "jordan 1", "converse trainers", "vans shoes"
+]
+
+
+class StandInServer:
+    """Local HTTP server that answers eBay search URLs with recorded pages"""
+
+    def __init__(self, pages, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=0):
+        self.pages = pages
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with server.lock:
+                    server.requests += 1
+                    fail = server.random.random() < server.error_rate
+                    delay = max(0.0, server.random.gauss(server.latency_ms, server.jitter_ms)) / 1000
+                    page = server.pages[server.requests % len(server.pages)]
+                    if fail:
+                        server.errors += 1
+                time.sleep(delay)
+
+                body = b'' if fail else page
+                self.send_response(503 if fail else 200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.errors = 0
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def make_payload(rng, query):
+    return {
+        'item_name': query,
+        'price': round(rng.uniform(15, 150), 2),
+        'days': rng.randint(0, 60),
+        'interested': rng.randint(0, 12),
+        'views': rng.randint(0, 300)
+    }
+
+
+def make_scenarios(app_module):
+    client = app_module.app.test_client()
+
+    def analyze(rng, query):
+        response = client.post('/analyze', json=make_payload(rng, query))
+        return response.status_code == 200 and response.get_json()['success']
+
+    def market_trends(rng, query):
+        response = client.get(f'/api/market-trends/{query}')
+        return response.status_code == 200 and response.get_json()['success']
+
+    def strategy(rng, query):
+        return 'offer_price' in app_module.analyzer.generate_enhanced_strategy(make_payload(rng, query))
+
+    return {'analyze': analyze, 'market_trends': market_trends, 'strategy': strategy}
+
+
+def reset_state(app_module, db_path):
+    """Drop every cache so each level starts cold"""
+    analyzer = app_module.analyzer
+    analyzer.write_queue.flush()
+    analyzer.market_trends_cache.invalidate()
+    analyzer.sold_listings_cache.invalidate()
+    analyzer.seller_profiles_cache.invalidate()
+    analyzer.strategy_cache.invalidate()
+    with analyzer.db.transaction() as conn:
+        conn.execute('DELETE FROM market_data')
+        conn.execute('DELETE FROM market_data_fetches')
+        conn.execute('DELETE FROM seller_profiles')
+
+
+def run_level(scenario, concurrency, total_requests, queries, trace_allocations, seed):
+    rng_lock = threading.Lock()
+    rng = random.Random(seed)
+    latencies = []
+    failures = 0
+
+    def one(index):
+        nonlocal failures
+        with rng_lock:
+            request_rng = random.Random(rng.random())
+        query = queries[index % len(queries)]
+        start = time.perf_counter()
+        try:
+            ok = scenario(request_rng, query)
+        except Exception:
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000
+        with rng_lock:
+            latencies.append(elapsed)
+            if not ok:
+                failures += 1
+
+    if trace_allocations:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total_requests)))
+    wall = time.perf_counter() - started
+    allocations = None
+    if trace_allocations:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        allocations = {
+            'peak_kb': round(peak / 1024, 1),
+            'live_kb': round(sum(stat.size for stat in snapshot.statistics('filename')) / 1024, 1)
+        }
+
+    latencies.sort()
+    return {
+        'requests': total_requests,
+        'failures': failures,
+        'wall_seconds': round(wall, 3),
+        'throughput_rps': round(total_requests / wall, 2),
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 2),
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'max': round(latencies[-1], 2)
+        },
+        'allocations': allocations
+    }
+
+
+def git_version():
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(previous, current):
+    """Print latency and throughput changes against an earlier results file"""
+    print(f"\nChange vs {previous['version']}:")
+    old = {(r['scenario'], r['concurrency']): r for r in previous['results']}
+    for result in current['results']:
+        before = old.get((result['scenario'], result['concurrency']))
+        if not before:
+            continue
+        deltas = []
+        for key in ('p50', 'p95', 'p99'):
+            was, now = before['latency_ms'][key], result['latency_ms'][key]
+            deltas.append(f"{key} {(now - was) / was * 100:+.1f}%" if was else f"{key} n/a")
+        was, now = before['throughput_rps'], result['throughput_rps']
+        deltas.append(f"rps {(now - was) / was * 100:+.1f}%" if was else "rps n/a")
+        print(f"  {result['scenario']:<14} c={result['concurrency']:<3} " + "  ".join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default='analyze,market_trends,strategy')
+    parser.add_argument('--concurrency', default='1,4,16')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario and level')
+    parser.add_argument('--queries', type=int, default=8, help='distinct item queries in the mix')
+    parser.add_argument('--latency-ms', type=float, default=150.0, help='stand-in response latency')
+    parser.add_argument('--jitter-ms', type=float, default=50.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of stand-in 503s')
+    parser.add_argument('--no-allocations', action='store_true', help='skip tracemalloc (it slows runs)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--compare', help='earlier results JSON to diff against')
+    args = parser.parse_args()
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html'))):
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+    if not pages:
+        raise SystemExit("No fixtures found; run benchmarks/make_fixtures.py")
+
+    server = StandInServer(pages, args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    workdir = tempfile.mkdtemp(prefix='vinted-bench-')
+    db_path = os.path.join(workdir, 'bench.db')
+
+    # The app reads its configuration at import time
+    os.environ.update({
+        'EBAY_BASE_URL': server.url,
+        'VINTED_DB_PATH': db_path,
+        'MARKET_REFRESHER': '0',
+    })
+    sys.path.insert(0, ROOT)
+    import logging
+    logging.disable(logging.WARNING)
+    import app as app_module
+
+    scenarios = make_scenarios(app_module)
+    queries = QUERIES[:args.queries]
+    report = {
+        'version': git_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'results': []
+    }
+
+    for name in args.scenarios.split(','):
+        for concurrency in [int(c) for c in args.concurrency.split(',')]:
+            reset_state(app_module, db_path)
+            server.reset()
+            result = run_level(scenarios[name], concurrency, args.requests, queries,
+                               not args.no_allocations, args.seed)
+            result.update({
+                'scenario': name,
+                'concurrency': concurrency,
+                'upstream_requests': server.requests,
+                'upstream_errors': server.errors
+            })
+            report['results'].append(result)
+
+            latency = result['latency_ms']
+            allocations = f"  peak {result['allocations']['peak_kb']:.0f} KB" if result['allocations'] else ''
+            print(f"{name:<14} c={concurrency:<3} {result['throughput_rps']:8.1f} req/s  "
+                  f"p50 {latency['p50']:8.1f}  p95 {latency['p95']:8.1f}  p99 {latency['p99']:8.1f} ms  "
+                  f"upstream {server.requests:<4} failures {result['failures']}{allocations}")
+
+    server.close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
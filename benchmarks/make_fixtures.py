@@ -0,0 +1,100 @@
+"""Generate recorded-style eBay sold listings pages for the offline benchmarks.
+
+The pages mirror the markup the scraper relies on (``li.s-item`` cards with
+``.s-item__price`` and ``.s-item__endedDate``) wrapped in the bulky scripts,
+styles and navigation a real results page carries. Output is deterministic.
+
+    python benchmarks/make_fixtures.py
+"""
+import os
+import random
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+TITLES = [
+    "Nike Air Max 90 Trainers White", "Adidas Samba OG Black Gum", "North Face Nuptse 700 Puffer Jacket",
+    "Carhartt WIP Detroit Jacket", "Ralph Lauren Polo Shirt Navy", "Levi's 501 Jeans W32 L32",
+    "Patagonia Better Sweater Fleece", "Stone Island Crewneck Sweatshirt", "Dr Martens 1460 Boots",
+    "Gucci Marmont Bag", "Barbour Wax Jacket", "New Balance 550 White Green"
+]
+
+
+def _card(rng: random.Random, index: int) -> str:
+    title = rng.choice(TITLES)
+    low = rng.uniform(6, 180)
+    if rng.random() < 0.08:
+        price = f"&pound;{low:,.2f} to &pound;{low * 1.4:,.2f}"
+    else:
+        price = f"&pound;{low:,.2f}"
+
+    if rng.random() < 0.7:
+        ended = f'<span class="s-item__endedDate">Sold {rng.randint(0, 89)} days ago</span>'
+    else:
+        ended = (f'<span class="s-item__title--tag"><span class="POSITIVE">'
+                 f'Sold  {rng.randint(1, 28)} {rng.choice(["Jan", "Feb", "Mar", "Apr"])} 2024</span></span>')
+
+    return f'''
+<li class="s-item s-item__pl-on-bottom" data-view="mi:1686|iid:{index + 1}" id="item{index:x}">
+  <div class="s-item__wrapper clearfix">
+    <div class="s-item__image-section">
+      <div class="s-item__image"><a tabindex="-1" href="https://www.ebay.co.uk/itm/{3000000000 + index}?hash=item{index:x}">
+        <div class="s-item__image-wrapper image-treatment"><img alt="{title}" src="https://i.ebayimg.com/thumbs/images/g/{index:x}/s-l225.webp" loading="lazy"></div>
+      </a></div>
+    </div>
+    <div class="s-item__info clearfix">
+      <a class="s-item__link" href="https://www.ebay.co.uk/itm/{3000000000 + index}">
+        <div class="s-item__title"><span role="heading" aria-level="3">{title} Size {rng.choice(["S", "M", "L", "UK 9", "W32"])}</span></div>
+      </a>
+      <div class="s-item__subtitle"><span class="SECONDARY_INFO">Pre-owned</span> &middot; <span>{rng.choice(["Nike", "Adidas", "Carhartt", "Unbranded"])}</span></div>
+      <div class="s-item__reviews"><div class="x-star-rating"><span class="clipped">4.5 out of 5 stars.</span></div></div>
+      <div class="s-item__details clearfix">
+        <div class="s-item__details-section--primary">
+          <div class="s-item__detail s-item__detail--primary"><span class="s-item__price"><span class="POSITIVE">{price}</span></span></div>
+          <div class="s-item__detail s-item__detail--primary"><span class="s-item__purchase-options s-item__purchaseOptions">{rng.choice(["Buy it now", "or Best Offer", "12 bids"])}</span></div>
+          <div class="s-item__detail s-item__detail--primary"><span class="s-item__shipping s-item__logisticsCost">+&pound;{rng.uniform(0, 6):.2f} postage</span></div>
+        </div>
+        <div class="s-item__details-section--secondary"><span class="s-item__location s-item__itemLocation">from United Kingdom</span><br>{ended}</div>
+      </div>
+      <div class="s-item__watchheart"><svg class="icon icon--save-small" focusable="false" aria-hidden="true"><use href="#icon-save-small"></use></svg></div>
+    </div>
+  </div>
+</li>'''
+
+
+def make_page(seed: int, cards: int, padding_kb: int) -> str:
+    """Build one results page with a given number of cards and inline asset padding"""
+    rng = random.Random(seed)
+    script = "window.SRP={" + ",".join(f'"k{i}":"{rng.getrandbits(64):x}"' for i in range(padding_kb * 20)) + "};"
+    style = "".join(f".x-{i}{{margin:{i % 13}px;padding:{i % 7}px}}" for i in range(padding_kb * 30))
+    nav = "".join(f'<li class="srp-refine__category__item"><a href="/b/c{i}">Category {i}</a></li>' for i in range(80))
+    shop_card = ('<li class="s-item s-item__pl-on-bottom"><div class="s-item__info"><div class="s-item__title">'
+                 '<span>Shop on eBay</span></div><span class="s-item__price">&pound;20.00</span></div></li>')
+    results = shop_card + "".join(_card(rng, i) for i in range(cards))
+    return f'''<!DOCTYPE html>
+<html lang="en-GB"><head><meta charset="utf-8"><title>Sold listings | eBay</title>
+<link rel="stylesheet" href="https://ir.ebaystatic.com/rs/c/srp.css">
+<style>{style}</style><script>{script}</script></head>
+<body class="srp-main">
+<header class="gh-header"><nav><ul class="srp-refine">{nav}</ul></nav></header>
+<div class="srp-river srp-layout-inner"><div class="srp-river-main">
+<ul class="srp-results srp-list clearfix">{results}</ul>
+</div></div>
+<footer class="gh-footer"><p>Copyright &copy; 1995-2024 eBay Inc.<p>All rights reserved.</footer>
+<script>{script}</script>
+</body></html>
+'''
+
+
+FIXTURES = {
+    'ebay_sold_small.html': dict(seed=1, cards=30, padding_kb=40),
+    'ebay_sold_typical.html': dict(seed=2, cards=60, padding_kb=200),
+}
+
+
+if __name__ == '__main__':
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for name, params in FIXTURES.items():
+        path = os.path.join(FIXTURES_DIR, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(make_page(**params))
+        print(f"{path}: {os.path.getsize(path) // 1024} KB")
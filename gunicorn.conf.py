@@ -0,0 +1,15 @@
+"""Gunicorn settings: load the app once in the master and fork workers from it."""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+# Import app.py once in the master; workers share its memory copy-on-write
+preload_app = True
+
+
+def when_ready(server):
+    # Runs in the master after the preload and before workers fork, so the
+    # schema is migrated once and the catalog indexes are built once
+    import app
+    app.analyzer.warm()
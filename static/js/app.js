@@ -58,6 +58,9 @@ class VintedProApp {
         // Display recent items
         this.displayRecentItems();
         
+        // Share watched markets with the server
+        this.syncWatchedMarkets();
+        
         // Register service worker
         if ('serviceWorker' in navigator) {
             navigator.serviceWorker.register('/static/sw.js').catch(console.error);
@@ -100,6 +103,7 @@ class VintedProApp {
                     original_price: this.currentAnalysis.originalData.price,
                     offered_price: this.currentAnalysis.result.strategy.offer_price,
                     strategy_used: this.currentAnalysis.result.strategy.method,
+                    seller_id: this.currentAnalysis.originalData.seller_data?.seller_id,
                     outcome: outcome
                 })
             });
@@ -292,6 +296,9 @@ class VintedProApp {
             watchedItems.push(itemName);
             localStorage.setItem('watchedMarkets', JSON.stringify(watchedItems));
             
+            // Let the server keep this market's data warm
+            this.registerWatchedMarket(itemName);
+            
             this.showToast(`👀 Now watching market for "${itemName}"`, 'success');
         } else {
             this.showToast(`Already watching "${itemName}"`, 'info');
@@ -300,6 +307,51 @@ class VintedProApp {
         this.triggerHaptic();
     }
 
+    registerWatchedMarket(itemName) {
+        return fetch('/api/watchlist', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ item_name: itemName })
+        }).then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            return true;
+        }).catch(error => {
+            console.error('Watchlist sync error:', error);
+            return false;
+        });
+    }
+
+    syncWatchedMarkets() {
+        // Markets watched before the server-side watchlist existed are sent once
+        try {
+            if (localStorage.getItem('watchedMarketsSynced')) return;
+            
+            // Each POST adds a watcher, so only markets not yet accepted are sent again
+            const sent = JSON.parse(localStorage.getItem('watchedMarketsSent') || '[]');
+            const watchedItems = JSON.parse(localStorage.getItem('watchedMarkets') || '[]')
+                .filter(itemName => !sent.includes(itemName));
+            Promise.all(watchedItems.map(itemName => this.registerWatchedMarket(itemName)))
+                .then(results => {
+                    watchedItems.forEach((itemName, index) => {
+                        if (results[index]) sent.push(itemName);
+                    });
+                    if (results.every(Boolean)) {
+                        localStorage.setItem('watchedMarketsSynced', 'true');
+                        localStorage.removeItem('watchedMarketsSent');
+                    } else {
+                        // The rest are retried on the next load
+                        localStorage.setItem('watchedMarketsSent', JSON.stringify(sent));
+                    }
+                });
+        } catch (e) {
+            // Ignore if localStorage not available
+        }
+    }
+
     updatePriceIndicator() {
         const priceInput = document.getElementById('price');
         const itemNameInput = document.getElementById('itemName');
@@ -571,6 +623,12 @@ class VintedProApp {
             interested: parseInt(formData.get('interested')),
             views: formData.get('views') ? parseInt(formData.get('views')) : undefined
         };
+        
+        // A seller id lets the server use, and learn, that seller's profile
+        const sellerId = document.getElementById('sellerId')?.value.trim();
+        if (sellerId) {
+            data.seller_data = { seller_id: sellerId };
+        }
 
         if (!this.validateData(data)) {
             this.showError('Please fill in all required fields correctly.');
@@ -582,18 +640,7 @@ class VintedProApp {
         this.hideError();
 
         try {
-            const response = await fetch('/analyze', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify(data)
-            });
-
-            if (!response.ok) {
-                const errorData = await response.json();
-                throw new Error(errorData.error || `HTTP ${response.status}`);
-            }
-
-            const result = await response.json();
+            const result = await this.streamAnalysis(data, (stage) => this.displayStage(stage, data));
             
             if (result.success) {
                 this.currentAnalysis = { result, originalData: data };
@@ -613,6 +660,90 @@ class VintedProApp {
         }
     }
 
+    // Reads the NDJSON stage lines as they arrive and resolves with the final strategy line
+    async streamAnalysis(data, onStage) {
+        const response = await fetch('/api/analyze-stream', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(data)
+        });
+
+        if (!response.ok) {
+            const errorData = await response.json();
+            throw new Error(errorData.error || `HTTP ${response.status}`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let result = null;
+
+        const handleLine = (line) => {
+            if (!line.trim()) return;
+            const stage = JSON.parse(line);
+            if (stage.stage === 'error') {
+                throw new Error(stage.error || 'Analysis failed');
+            }
+            if (stage.stage === 'strategy') {
+                result = stage;
+            } else {
+                onStage(stage);
+            }
+        };
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            lines.forEach(handleLine);
+        }
+        handleLine(buffer + decoder.decode());
+
+        if (!result) {
+            throw new Error('Analysis ended before a strategy was produced');
+        }
+        return result;
+    }
+
+    // Renders a partial result; the final strategy line goes through displayResults
+    displayStage(stage, originalData) {
+        if (stage.stage === 'preliminary') {
+            // Cheap results are in, so the overlay gives way while the button keeps spinning
+            this.loadingOverlay.style.display = 'none';
+            this.updateMarketPrice(stage.estimated_price);
+            this.updateSellerInsights(stage.analysis, stage.insights, stage.enhanced_features);
+            this.updateTimingAnalysis(stage.enhanced_features?.timing_analysis);
+
+            // Clear what a previous analysis left in the cards still to come
+            const placeholders = {
+                strategyMethod: 'Calculating strategy...',
+                offerPrice: '-',
+                discountPercent: '-',
+                messageTemplate: '-',
+                marketComparison: 'Estimated from the item description, checking sold listings...',
+                trendInsights: ''
+            };
+            Object.entries(placeholders).forEach(([id, text]) => {
+                const element = document.getElementById(id);
+                if (element) {
+                    element.textContent = text;
+                }
+            });
+            this.showResults();
+        } else if (stage.stage === 'market_analysis') {
+            this.updateMarketPrice(stage.market_price);
+            const comparisonElement = document.getElementById('marketComparison');
+            if (comparisonElement && stage.insights?.market_comparison) {
+                comparisonElement.textContent = stage.insights.market_comparison;
+            }
+            this.updateBrandAnalysis(stage.analysis.brand_info);
+        } else if (stage.stage === 'market_trends') {
+            this.updateMarketTrends(stage.market_trends, stage.insights);
+        }
+    }
+
     validateData(data) {
         return data.item_name && 
                data.item_name.length >= 3 &&
@@ -687,12 +818,16 @@ class VintedProApp {
         this.showResults();
     }
 
-    updateMarketAnalysis(marketPrice, strategy, originalData, insights, enhancedFeatures) {
-        // Update market price
+    updateMarketPrice(marketPrice) {
         const marketPriceElement = document.getElementById('marketPrice');
         if (marketPriceElement) {
             marketPriceElement.textContent = marketPrice.toFixed(2);
         }
+    }
+
+    updateMarketAnalysis(marketPrice, strategy, originalData, insights, enhancedFeatures) {
+        // Update market price
+        this.updateMarketPrice(marketPrice);
         
         // Update savings
         const savings = originalData.price - strategy.offer_price;
@@ -709,9 +844,17 @@ class VintedProApp {
         }
         
         // Update market trends if available
-        if (enhancedFeatures?.market_trends) {
-            const trends = enhancedFeatures.market_trends;
-            
+        this.updateMarketTrends(enhancedFeatures?.market_trends, insights);
+        
+        // Update market comparison
+        const comparisonElement = document.getElementById('marketComparison');
+        if (comparisonElement && insights?.market_comparison) {
+            comparisonElement.textContent = insights.market_comparison;
+        }
+    }
+
+    updateMarketTrends(trends, insights) {
+        if (trends) {
             const marketTrendElement = document.getElementById('marketTrend');
             if (marketTrendElement) {
                 const trendIcon = trends.price_trend === 'rising' ? '📈' : 
@@ -726,12 +869,6 @@ class VintedProApp {
             }
         }
         
-        // Update market comparison
-        const comparisonElement = document.getElementById('marketComparison');
-        if (comparisonElement && insights?.market_comparison) {
-            comparisonElement.textContent = insights.market_comparison;
-        }
-        
         // Update trend insights
         const trendInsightsElement = document.getElementById('trendInsights');
         if (trendInsightsElement && insights?.trend_insights) {
@@ -833,7 +970,8 @@ class VintedProApp {
             
             const responsePatternElement = document.getElementById('responsePattern');
             if (responsePatternElement) {
-                responsePatternElement.textContent = `${profile.avg_response_time}h avg`;
+                // The average is learned from outcomes, so show it to one decimal place at most
+                responsePatternElement.textContent = `${Number(profile.avg_response_time.toFixed(1))}h avg`;
             }
             
             const flexibilityElement = document.getElementById('flexibilityScore');
@@ -1127,6 +1265,9 @@ class VintedProApp {
     }
 
     showResults() {
+        // Later stages of a streamed analysis fill in results that are already on screen
+        if (this.resultsSection.style.display === 'block') return;
+        
         this.resultsSection.style.display = 'block';
         this.resultsSection.scrollIntoView({ behavior: 'smooth', block: 'start' });
         
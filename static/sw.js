@@ -1,4 +1,5 @@
-const CACHE_NAME = 'vinted-deals-v1';
+const CACHE_NAME = 'vinted-deals-v2';
+const API_CACHE_NAME = 'vinted-api-v1';
 const urlsToCache = [
   '/',
   '/static/css/style.css',
@@ -6,6 +7,11 @@ const urlsToCache = [
   '/static/manifest.json'
 ];
 
+// GET endpoints whose responses carry Cache-Control and ETag headers
+const cacheableApiPaths = ['/api/brands', '/api/market-trends/'];
+// Every brand prefix typed and item looked up gets an entry, so keep the newest few
+const MAX_API_CACHE_ENTRIES = 100;
+
 // Install event
 self.addEventListener('install', (event) => {
   event.waitUntil(
@@ -16,8 +22,103 @@ self.addEventListener('install', (event) => {
   );
 });
 
+function isCacheableApiRequest(request) {
+  if (request.method !== 'GET') {
+    return false;
+  }
+  const url = new URL(request.url);
+  return url.origin === self.location.origin &&
+    cacheableApiPaths.some((path) => url.pathname.startsWith(path));
+}
+
+function cacheControlSeconds(response, directive) {
+  const match = (response.headers.get('Cache-Control') || '').match(new RegExp(`${directive}=(\\d+)`));
+  return match ? parseInt(match[1], 10) : 0;
+}
+
+function fetchedAt(response) {
+  return parseInt(response.headers.get('X-SW-Fetched-At') || '0', 10);
+}
+
+function ageSeconds(response) {
+  return (Date.now() - fetchedAt(response)) / 1000;
+}
+
+function usableSeconds(response) {
+  return cacheControlSeconds(response, 'max-age') + cacheControlSeconds(response, 'stale-while-revalidate');
+}
+
+// Drop entries too old to serve, then the oldest beyond MAX_API_CACHE_ENTRIES
+async function trimApiCache(cache) {
+  const requests = await cache.keys();
+  const entries = [];
+  for (const request of requests) {
+    const response = await cache.match(request);
+    if (!response || ageSeconds(response) >= usableSeconds(response)) {
+      await cache.delete(request);
+    } else {
+      entries.push({ request, fetchedAt: fetchedAt(response) });
+    }
+  }
+
+  entries.sort((a, b) => b.fetchedAt - a.fetchedAt);
+  await Promise.all(entries.slice(MAX_API_CACHE_ENTRIES).map((entry) => cache.delete(entry.request)));
+}
+
+// Fetch from the network (the browser revalidates with If-None-Match) and keep a stamped copy
+async function fetchAndCache(request) {
+  const response = await fetch(request);
+  if (response.ok && !/no-store/.test(response.headers.get('Cache-Control') || '')) {
+    const headers = new Headers(response.headers);
+    headers.set('X-SW-Fetched-At', String(Date.now()));
+    const body = await response.clone().blob();
+    const cache = await caches.open(API_CACHE_NAME);
+    await cache.put(request, new Response(body, {
+      status: response.status,
+      statusText: response.statusText,
+      headers
+    }));
+    await trimApiCache(cache);
+  }
+  return response;
+}
+
+// Fresh copies are served without touching the network; stale ones are
+// served at once and refreshed in the background until stale-while-revalidate runs out
+async function staleWhileRevalidate(event) {
+  const cache = await caches.open(API_CACHE_NAME);
+  const cached = await cache.match(event.request);
+
+  if (cached) {
+    const age = ageSeconds(cached);
+    const maxAge = cacheControlSeconds(cached, 'max-age');
+    if (age < maxAge) {
+      return cached;
+    }
+    if (age < usableSeconds(cached)) {
+      event.waitUntil(fetchAndCache(event.request).catch(() => {}));
+      return cached;
+    }
+  }
+
+  try {
+    return await fetchAndCache(event.request);
+  } catch (error) {
+    // Offline: an expired answer beats none
+    if (cached) {
+      return cached;
+    }
+    throw error;
+  }
+}
+
 // Fetch event
 self.addEventListener('fetch', (event) => {
+  if (isCacheableApiRequest(event.request)) {
+    event.respondWith(staleWhileRevalidate(event));
+    return;
+  }
+
   event.respondWith(
     caches.match(event.request)
       .then((response) => {
@@ -33,11 +134,11 @@ self.addEventListener('activate', (event) => {
     caches.keys().then((cacheNames) => {
       return Promise.all(
         cacheNames.map((cacheName) => {
-          if (cacheName !== CACHE_NAME) {
+          if (cacheName !== CACHE_NAME && cacheName !== API_CACHE_NAME) {
             return caches.delete(cacheName);
           }
         })
       );
     })
   );
-});
\ No newline at end of file
+});